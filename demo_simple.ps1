@@ -371,9 +371,9 @@ Write-Title "FR-3.3: Market Data Broadcasting (Redis Pub/Sub)"
 
 Write-Step "Checking market data channels"
 
-# Check if trades were published
-$tradeCount = docker exec redis redis-cli PUBSUB NUMSUB trade_events | Select-String -Pattern "\d+" | ForEach-Object { $_.Matches.Value } | Select-Object -Last 1
-Write-Demo "Trade events channel: $tradeCount subscribers"
+# Trades go to per-symbol channels (trade_events:<symbol>); Market Data PSUBSCRIBEs to the pattern
+$tradeCount = docker exec redis redis-cli PUBSUB NUMPAT | Select-String -Pattern "\d+" | ForEach-Object { $_.Matches.Value } | Select-Object -Last 1
+Write-Demo "Trade events pattern (trade_events:*): $tradeCount pattern subscribers"
 
 $bboCount = docker exec redis redis-cli PUBSUB NUMSUB bbo_updates | Select-String -Pattern "\d+" | ForEach-Object { $_.Matches.Value } | Select-Object -Last 1
 Write-Demo "BBO updates channel: $bboCount subscribers"
@@ -7,17 +7,22 @@ import json
 import logging
 import asyncio
 import os
-from typing import Set
+from typing import Dict
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
+import msgpack
 import redis
 
 
 # Constants (centralized in order-gateway but duplicated here for independence)
 TRADE_EVENTS_CHANNEL = "trade_events"
+TRADE_EVENTS_PATTERN = f"{TRADE_EVENTS_CHANNEL}:*"  # Trades are sharded per symbol
 BBO_UPDATES_CHANNEL = "bbo_updates"
 ORDER_BOOK_CHANNEL = "order_book_updates"
 
+# WebSocket frame encodings a client can pick with ?encoding=...
+WS_ENCODINGS = ("json", "msgpack")
+
 
 # Logging setup
 logging.basicConfig(
@@ -41,30 +46,47 @@ class ConnectionManager:
     """
 
     def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+        # Connection -> frame encoding ("json" text frames or "msgpack" binary frames)
+        self.active_connections: Dict[WebSocket, str] = {}
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, encoding: str = "json"):
         """Accept new WebSocket connection"""
         await websocket.accept()
-        self.active_connections.add(websocket)
+        self.active_connections[websocket] = encoding
         print(f"Client connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         """Remove WebSocket connection"""
-        self.active_connections.discard(websocket)
+        self.active_connections.pop(websocket, None)
         print(f"Client disconnected. Total connections: {len(self.active_connections)}")
 
+    async def send(self, websocket: WebSocket, message: dict):
+        """Send one message in the connection's negotiated encoding"""
+        if self.active_connections.get(websocket) == "msgpack":
+            await websocket.send_bytes(msgpack.packb(message))
+        else:
+            await websocket.send_json(message)
+
     async def broadcast(self, message: dict):
         """
         Broadcast message to all connected clients
 
+        Each encoding is serialized once, not once per client.
         Removes disconnected clients automatically
         """
         disconnected = set()
+        frames = {}  # encoding -> encoded frame, built on first use
 
-        for connection in self.active_connections:
+        for connection, encoding in list(self.active_connections.items()):
             try:
-                await connection.send_json(message)
+                if encoding not in frames:
+                    frames[encoding] = (
+                        msgpack.packb(message) if encoding == "msgpack" else json.dumps(message)
+                    )
+                if encoding == "msgpack":
+                    await connection.send_bytes(frames[encoding])
+                else:
+                    await connection.send_text(frames[encoding])
             except WebSocketDisconnect:
                 disconnected.add(connection)
             except Exception as e:
@@ -110,18 +132,19 @@ async def redis_subscriber():
     """
     try:
         redis_client = get_redis_client()
-        pubsub = redis_client.pubsub()
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
 
-        # Subscribe to all market data channels
-        pubsub.subscribe(TRADE_EVENTS_CHANNEL)
-        pubsub.subscribe(BBO_UPDATES_CHANNEL)
-        pubsub.subscribe(ORDER_BOOK_CHANNEL)
+        # Subscribe to all market data channels. Fixed channels use a plain
+        # SUBSCRIBE (one command for both); the pattern only covers the
+        # per-symbol trade shards, whose names aren't known up front
+        pubsub.psubscribe(TRADE_EVENTS_PATTERN)
+        pubsub.subscribe(BBO_UPDATES_CHANNEL, ORDER_BOOK_CHANNEL)
 
         logger.info(
             "subscribed_channels",
             extra={
                 "channels": [
-                    TRADE_EVENTS_CHANNEL,
+                    TRADE_EVENTS_PATTERN,
                     BBO_UPDATES_CHANNEL,
                     ORDER_BOOK_CHANNEL,
                 ]
@@ -140,7 +163,7 @@ async def redis_subscriber():
                     lambda: pubsub.get_message(timeout=1.0),
                 )
 
-                if message_data and message_data["type"] == "message":
+                if message_data and message_data["type"] in ("message", "pmessage"):
                     try:
                         # Parse message data
                         data = json.loads(message_data["data"])
@@ -149,7 +172,7 @@ async def redis_subscriber():
                         channel = message_data.get("channel", "")
 
                         # Broadcast to all WebSocket clients with appropriate type
-                        if channel == TRADE_EVENTS_CHANNEL:
+                        if message_data["type"] == "pmessage":  # trade_events:<symbol>
                             await manager.broadcast({"type": "trade", "data": data})
                             logger.info(
                                 "broadcast_trade",
@@ -238,6 +261,9 @@ async def market_data_websocket(websocket: WebSocket):
     Implements FR-3.2: WebSocket market data API (BBO + L2 depth)
     Implements FR-3.3: Real-time trade execution feed
 
+    Frames are JSON text by default; connect with ?encoding=msgpack to
+    receive the same messages as msgpack binary frames.
+
     Clients connect and receive three types of messages:
 
     1. Trade Execution Events:
@@ -279,11 +305,15 @@ async def market_data_websocket(websocket: WebSocket):
         }
     }
     """
-    await manager.connect(websocket)
+    encoding = websocket.query_params.get("encoding", "json")
+    if encoding not in WS_ENCODINGS:
+        encoding = "json"
+    await manager.connect(websocket, encoding)
 
     try:
         # Send welcome message
-        await websocket.send_json(
+        await manager.send(
+            websocket,
             {
                 "type": "connected",
                 "message": "Connected to GoQuant Market Data Feed",
@@ -299,11 +329,11 @@ async def market_data_websocket(websocket: WebSocket):
             # For now, just acknowledge (future: handle subscribe/unsubscribe)
             try:
                 client_msg = json.loads(data)
-                await websocket.send_json(
-                    {"type": "ack", "message": f"Received: {client_msg}"}
+                await manager.send(
+                    websocket, {"type": "ack", "message": f"Received: {client_msg}"}
                 )
             except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "message": "Invalid JSON"})
+                await manager.send(websocket, {"type": "error", "message": "Invalid JSON"})
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -24,6 +24,7 @@ import redis
 
 # Constants
 TRADE_EVENTS_CHANNEL = "trade_events"
+TRADE_EVENTS_PATTERN = f"{TRADE_EVENTS_CHANNEL}:*"  # Trades are sharded per symbol
 ORDER_BOOK_CHANNEL = "order_book_updates"
 
 # OPTIMIZATION SETTINGS
@@ -231,22 +232,22 @@ def get_redis_client():
 
 async def redis_subscriber():
     """
-    Background task: Subscribe to Redis trade_events channel
+    Background task: Subscribe to the per-symbol Redis trade_events:<symbol> channels
     Broadcasts messages to all WebSocket clients with batching
     
     Implements FR-3.3: Real-time trade execution broadcast (optimized)
     """
     try:
         redis_client = get_redis_client()
-        pubsub = redis_client.pubsub()
-        pubsub.subscribe(TRADE_EVENTS_CHANNEL)
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(TRADE_EVENTS_PATTERN)
         
-        print(f"✅ Subscribed to Redis channel: {TRADE_EVENTS_CHANNEL}")
+        print(f"✅ Subscribed to Redis channels: {TRADE_EVENTS_PATTERN}")
         print(f"⚡ Batching enabled: {BATCH_INTERVAL_MS}ms window, max {MAX_BATCH_SIZE} messages")
         
         # Listen for messages (non-blocking with timeout)
         for message in pubsub.listen():
-            if message["type"] == "message":
+            if message["type"] == "pmessage":
                 try:
                     # Parse trade event
                     trade_data = json.loads(message["data"])
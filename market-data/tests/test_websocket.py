@@ -11,6 +11,7 @@ Test Strategy:
 import pytest
 import json
 import asyncio
+import msgpack
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 from fastapi.testclient import TestClient
 
@@ -169,7 +170,41 @@ def test_websocket_client_message_acknowledged(client):
         assert "Received" in response["message"]
 
 
-# Test 6: Health check endpoint
+# Test 6: msgpack clients receive the same messages as binary frames
+def test_msgpack_client_receives_binary_frames(client):
+    """
+    Test Case 6: Per-connection frame encoding
+    
+    Given: One JSON client and one ?encoding=msgpack client connected
+    When: Trade event is broadcast
+    Then: JSON client gets a text frame, msgpack client the same message as a binary frame
+    """
+    # Arrange
+    with client.websocket_connect("/ws/market-data") as json_ws:
+        with client.websocket_connect("/ws/market-data?encoding=msgpack") as msgpack_ws:
+            json_welcome = json_ws.receive_json()
+            msgpack_welcome = msgpack.unpackb(msgpack_ws.receive_bytes())
+            assert msgpack_welcome == json_welcome
+            
+            test_trade = {
+                "type": "trade",
+                "data": {
+                    "trade_id": "T0002",
+                    "symbol": "BTC-USDT",
+                    "price": "60000.00",
+                    "quantity": "0.5"
+                }
+            }
+            
+            # Act
+            asyncio.run(manager.broadcast(test_trade))
+            
+            # Assert
+            assert json_ws.receive_json() == test_trade
+            assert msgpack.unpackb(msgpack_ws.receive_bytes()) == test_trade
+
+
+# Test 7: Health check endpoint
 def test_health_check_endpoint(client):
     """
     Test: Health check returns service status
@@ -197,7 +232,7 @@ def test_health_check_endpoint(client):
         assert data["redis"] == "disconnected"
 
 
-# Test 7: Stats endpoint
+# Test 8: Stats endpoint
 def test_stats_endpoint(client):
     """
     Test: Stats endpoint returns service metrics
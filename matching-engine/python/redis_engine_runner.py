@@ -5,7 +5,7 @@ Integrates with Order Gateway and Market Data services via Redis
 Architecture:
 1. BLPOP orders from "order_queue" (blocking read)
 2. Process through MatchingEngine
-3. PUBLISH trades to "trade_events" channel
+3. PUBLISH trades to the per-symbol "trade_events:<symbol>" channel
 """
 
 import redis
@@ -148,7 +148,7 @@ def main():
                 
                 for trade in trades:
                     trade_json = json.dumps(trade.to_dict())
-                    redis_client.publish(TRADE_EVENTS_CHANNEL, trade_json)
+                    redis_client.publish(f"{TRADE_EVENTS_CHANNEL}:{trade.symbol}", trade_json)
                     trade_count += 1
                     
                     print(f"      Trade {trade.trade_id}: "
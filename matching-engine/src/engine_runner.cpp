@@ -6,7 +6,7 @@
  * 1. BLPOP orders from Redis queue "order_queue" (blocking read, FIFO)
  * 2. Deserialize JSON to Order struct
  * 3. Process order through MatchingEngine at MAXIMUM SPEED
- * 4. Publish generated trades to Redis channel "trade_events"
+ * 4. Publish generated trades to Redis channel "trade_events:<symbol>"
  * 
  * Performance optimizations:
  * - Zero-copy string handling where possible
@@ -153,8 +153,10 @@ int main() {
                         logger::log_json(LogLevel::DEBUG, "Serializing trade", {{"trade_id", trade.trade_id}});
                         std::string trade_json = json_utils::serialize_trade(trade);
                         
-                        logger::log_json(LogLevel::DEBUG, "Publishing to trade_events channel", {{"trade_id", trade.trade_id}});
-                        bool published = redis.publish("trade_events", trade_json);
+                        // Per-symbol channel: subscribers only receive the symbols they follow
+                        const std::string channel = "trade_events:" + trade.symbol;
+                        logger::log_json(LogLevel::DEBUG, "Publishing to trade_events channel", {{"trade_id", trade.trade_id}, {"channel", channel}});
+                        bool published = redis.publish(channel, trade_json);
                         
                         if (published) {
                             logger::log_json(LogLevel::INFO, "Trade published", {
@@ -6,21 +6,53 @@ This is a TEMPORARY solution to demonstrate end-to-end functionality.
 The proper solution is to integrate hiredis into engine_runner.cpp.
 """
 
+import asyncio
 import json
+import msgpack
+import os
 import redis
+import redis.asyncio as aioredis
 import sys
+from collections import deque
 from pathlib import Path
 
+from sortedcontainers import SortedDict
+
 # Add matching-engine Python bindings to path (if available)
 # For now, we'll use a pure Python port of the matching logic
 sys.path.append(str(Path(__file__).parent.parent / "matching-engine" / "src"))
 
+# Max orders drained from the queue per round trip
+BATCH_SIZE = 1024
+
+# Symbols tracked for market data only - aggregated sizes, no matching
+MARKET_DATA_ONLY_SYMBOLS = frozenset(
+    symbol for symbol in os.getenv("MARKET_DATA_ONLY_SYMBOLS", "").split(",") if symbol
+)
+
+# An order is a map, so msgpack payloads start with a map header:
+# fixmap (0x80-0x8f), map 16 (0xde) or map 32 (0xdf). JSON text never starts
+# with those bytes, so anything else - including leading whitespace - is JSON
+MSGPACK_MAP_HEADERS = frozenset(range(0x80, 0x90)) | {0xde, 0xdf}
+
+
+def decode_order(raw):
+    """Decode a raw queue payload (msgpack or JSON bytes) without a str round trip"""
+    if raw[0] in MSGPACK_MAP_HEADERS:
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw)
+
 
 class Order:
     """Order representation matching C++ Order struct"""
-    def __init__(self, id, symbol, side, order_type, price, quantity, timestamp):
+    __slots__ = ('id', 'symbol', 'symbol_id', 'side', 'order_type', 'price',
+                 'quantity', 'remaining_quantity', 'timestamp')
+    
+    def __init__(self, id, symbol, side, order_type, price, quantity, timestamp,
+                 symbol_id=None):
         self.id = id
         self.symbol = symbol
+        self.symbol_id = symbol_id  # Interned index into MatchingEngine.order_books
         self.side = side  # "buy" or "sell"
         self.order_type = order_type  # "market", "limit", "ioc", "fok"
         self.price = float(price) if price else 0.0
@@ -29,10 +61,38 @@ class Order:
         self.timestamp = timestamp
 
 
+class OrderPool:
+    """Free-list of Order objects, recycled once they leave the book"""
+    __slots__ = ('free', 'max_size')
+    
+    def __init__(self, max_size=10000):
+        self.free = []
+        self.max_size = max_size  # Bound the free-list so bursts don't pin memory
+    
+    def alloc(self, id, symbol, side, order_type, price, quantity, timestamp,
+              symbol_id=None):
+        """Get a recycled Order (or a new one if the pool is empty)"""
+        if not self.free:
+            return Order(id, symbol, side, order_type, price, quantity, timestamp,
+                         symbol_id)
+        
+        order = self.free.pop()
+        order.__init__(id, symbol, side, order_type, price, quantity, timestamp,
+                       symbol_id)
+        return order
+    
+    def release(self, order):
+        """Return an Order that is no longer referenced by any book"""
+        if len(self.free) < self.max_size:
+            self.free.append(order)
+
+
 class LimitLevel:
     """Price level with FIFO order queue"""
+    __slots__ = ('orders', 'total_quantity')
+    
     def __init__(self):
-        self.orders = []  # List maintains FIFO order
+        self.orders = deque()  # Deque maintains FIFO order, O(1) popleft
         self.total_quantity = 0.0
 
 
@@ -41,9 +101,12 @@ class OrderBook:
     Order book implementing price-time priority
     Python port of C++ OrderBook class
     """
+    __slots__ = ('bids', 'asks', 'order_index')
+    aggregate_only = False
+    
     def __init__(self):
-        self.bids = {}  # price -> LimitLevel (sorted desc)
-        self.asks = {}  # price -> LimitLevel (sorted asc)
+        self.bids = SortedDict()  # price -> LimitLevel (best bid = last key)
+        self.asks = SortedDict()  # price -> LimitLevel (best ask = first key)
         self.order_index = {}  # order_id -> (price, side)
     
     def add_order(self, order):
@@ -84,12 +147,12 @@ class OrderBook:
         return False
     
     def get_best_bid(self):
-        """Get highest bid price"""
-        return max(self.bids.keys()) if self.bids else None
+        """Get highest bid price (O(1) - last key of sorted bids)"""
+        return self.bids.peekitem(-1)[0] if self.bids else None
     
     def get_best_ask(self):
-        """Get lowest ask price"""
-        return min(self.asks.keys()) if self.asks else None
+        """Get lowest ask price (O(1) - first key of sorted asks)"""
+        return self.asks.peekitem(0)[0] if self.asks else None
     
     def get_orders_at_price(self, side, price):
         """Get list of orders at given price"""
@@ -97,21 +160,161 @@ class OrderBook:
         return book.get(price, LimitLevel()).orders
 
 
+class AggregateOrderBook:
+    """
+    Aggregate-only order book for market-data-only symbols
+    Each level is just its total size - no per-order FIFO or order index
+    """
+    __slots__ = ('bids', 'asks')
+    aggregate_only = True
+    
+    def __init__(self):
+        self.bids = SortedDict()  # price -> total quantity (best bid = last key)
+        self.asks = SortedDict()  # price -> total quantity (best ask = first key)
+    
+    def add_order(self, side, price, quantity):
+        """Add quantity at price level"""
+        book = self.bids if side == "buy" else self.asks
+        book[price] = book.get(price, 0.0) + quantity
+    
+    def cancel_order(self, side, price, quantity):
+        """Remove quantity from price level (level dropped when empty)"""
+        book = self.bids if side == "buy" else self.asks
+        
+        if price not in book:
+            return False
+        
+        remaining = book[price] - quantity
+        if remaining > 0:
+            book[price] = remaining
+        else:
+            del book[price]
+        return True
+    
+    def get_best_bid(self):
+        """Get highest bid price"""
+        return self.bids.peekitem(-1)[0] if self.bids else None
+    
+    def get_best_ask(self):
+        """Get lowest ask price"""
+        return self.asks.peekitem(0)[0] if self.asks else None
+
+
+# Matcher template - one flat loop per (side, order_type), generated at import
+MATCHER_TEMPLATE = """
+def {name}(self, order, book):
+    levels = book.{counter_book}
+    trade_history = self.trade_history
+    order_pool = self.order_pool
+{pre_check}
+    while order.remaining_quantity > 0 and levels:
+        best_price, level = levels.peekitem({best_index})
+{price_check}
+        resting_order = level.orders[0]
+        fill_qty = min(order.remaining_quantity, resting_order.remaining_quantity)
+        
+        trade_history.append(self.generate_trade(resting_order, order, fill_qty))
+        
+        order.remaining_quantity -= fill_qty
+        resting_order.remaining_quantity -= fill_qty
+        level.total_quantity -= fill_qty
+        
+        if resting_order.remaining_quantity == 0:
+            # Fully filled maker is at the head of the level we hold - unlink inline
+            level.orders.popleft()
+            del book.order_index[resting_order.id]
+            if not level.orders:
+                del levels[best_price]
+            order_pool.release(resting_order)
+{rest_policy}
+"""
+
+# FOK pre-check: walk levels best-first, bail out unless the whole order fills
+FOK_PRE_CHECK = """
+    available_qty = 0.0
+    for price, level in {level_items}:
+        if order.price {worse_op} price:
+            break
+        available_qty += level.total_quantity
+        if available_qty >= order.quantity:
+            break
+    
+    if available_qty < order.quantity:
+        return
+"""
+
+LIMIT_REST_POLICY = """
+    if order.remaining_quantity > 0:
+        book.add_order(order)
+"""
+
+
+def build_matchers():
+    """Generate the (side, order_type) -> matcher table"""
+    matchers = {}
+    
+    for side in ("buy", "sell"):
+        # Buys lift asks from the lowest price, sells hit bids from the highest
+        if side == "buy":
+            counter_book, best_index, level_items, worse_op = "asks", 0, "levels.items()", "<"
+        else:
+            counter_book, best_index, level_items, worse_op = "bids", -1, "reversed(levels.items())", ">"
+        
+        price_check = (
+            f"        if order.price {worse_op} best_price:\n"
+            "            break"
+        )
+        
+        for order_type in ("market", "limit", "ioc", "fok"):
+            name = f"match_{order_type}_{side}"
+            source = MATCHER_TEMPLATE.format(
+                name=name,
+                counter_book=counter_book,
+                best_index=best_index,
+                pre_check=FOK_PRE_CHECK.format(level_items=level_items, worse_op=worse_op)
+                          if order_type == "fok" else "",
+                price_check=price_check if order_type != "market" else "",
+                rest_policy=LIMIT_REST_POLICY if order_type == "limit" else ""
+            )
+            
+            namespace = {}
+            exec(compile(source, f"<{name}>", "exec"), namespace)
+            matchers[(side, order_type)] = namespace[name]
+    
+    return matchers
+
+
+MATCHERS = build_matchers()
+
+
 class MatchingEngine:
     """
     Matching engine with price-time priority
     Python port of C++ MatchingEngine class
     """
-    def __init__(self):
-        self.order_books = {}  # symbol -> OrderBook
+    def __init__(self, market_data_only_symbols=MARKET_DATA_ONLY_SYMBOLS):
+        self.market_data_only_symbols = market_data_only_symbols
+        self.symbol_ids = {}  # symbol -> index into order_books
+        self.order_books = []  # symbol_id -> OrderBook
         self.trade_history = []
         self.trade_counter = 0
+        self.order_pool = OrderPool()
+    
+    def get_symbol_id(self, symbol):
+        """Intern symbol to a small int, creating its order book on first use"""
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.order_books)
+            self.symbol_ids[symbol] = symbol_id
+            if symbol in self.market_data_only_symbols:
+                self.order_books.append(AggregateOrderBook())
+            else:
+                self.order_books.append(OrderBook())
+        return symbol_id
     
     def get_book(self, symbol):
         """Get or create order book for symbol"""
-        if symbol not in self.order_books:
-            self.order_books[symbol] = OrderBook()
-        return self.order_books[symbol]
+        return self.order_books[self.get_symbol_id(symbol)]
     
     def generate_trade_id(self):
         """Generate deterministic trade ID"""
@@ -132,189 +335,98 @@ class MatchingEngine:
         }
     
     def process_order(self, order):
-        """Main entry point - dispatches to order type handler"""
-        book = self.get_book(order.symbol)
+        """Main entry point - dispatches to the generated matcher"""
+        if order.symbol_id is None:
+            order.symbol_id = self.get_symbol_id(order.symbol)
+        book = self.order_books[order.symbol_id]
         
-        if order.order_type == "market":
-            self.match_market_order(order, book)
-        elif order.order_type == "limit":
-            self.match_limit_order(order, book)
-        elif order.order_type == "ioc":
-            self.match_ioc_order(order, book)
-        elif order.order_type == "fok":
-            self.match_fok_order(order, book)
-    
-    def match_market_order(self, order, book):
-        """Market order - immediate execution, never rests"""
-        counter_side = "sell" if order.side == "buy" else "buy"
+        if book.aggregate_only:
+            # Market-data-only symbol: resting liquidity is aggregated, never matched
+            if order.order_type == "limit":
+                book.add_order(order.side, order.price, order.remaining_quantity)
+            return
         
-        while order.remaining_quantity > 0:
-            best_price = book.get_best_ask() if order.side == "buy" else book.get_best_bid()
-            
-            if best_price is None:
-                break
-            
-            orders_at_price = book.get_orders_at_price(counter_side, best_price)
-            if not orders_at_price:
-                break
-            
-            resting_order = orders_at_price[0]
-            fill_qty = min(order.remaining_quantity, resting_order.remaining_quantity)
-            
-            trade = self.generate_trade(resting_order, order, fill_qty)
-            self.trade_history.append(trade)
-            
-            order.remaining_quantity -= fill_qty
-            resting_order.remaining_quantity -= fill_qty
-            
-            if resting_order.remaining_quantity == 0:
-                book.cancel_order(resting_order.id)
+        matcher = MATCHERS.get((order.side, order.order_type))
+        if matcher is not None:
+            matcher(self, order, book)
     
-    def match_limit_order(self, order, book):
-        """Limit order - match at price or better, rest if not marketable"""
-        counter_side = "sell" if order.side == "buy" else "buy"
-        
-        while order.remaining_quantity > 0:
-            best_price = book.get_best_ask() if order.side == "buy" else book.get_best_bid()
-            
-            if best_price is None:
-                break
-            
-            # Check if limit order is marketable
-            is_marketable = False
-            if order.side == "buy":
-                is_marketable = order.price >= best_price
-            else:
-                is_marketable = order.price <= best_price
-            
-            if not is_marketable:
-                break
-            
-            orders_at_price = book.get_orders_at_price(counter_side, best_price)
-            if not orders_at_price:
-                break
-            
-            resting_order = orders_at_price[0]
-            fill_qty = min(order.remaining_quantity, resting_order.remaining_quantity)
-            
-            trade = self.generate_trade(resting_order, order, fill_qty)
-            self.trade_history.append(trade)
-            
-            order.remaining_quantity -= fill_qty
-            resting_order.remaining_quantity -= fill_qty
-            
-            if resting_order.remaining_quantity == 0:
-                book.cancel_order(resting_order.id)
-        
-        # Rest remaining quantity on book
-        if order.remaining_quantity > 0:
-            book.add_order(order)
+    def get_recent_trades(self):
+        """Get trades since last call (and clear) - O(1) list swap, no copy"""
+        trades = self.trade_history
+        self.trade_history = []
+        return trades
+
+
+def process_order_payload(engine, raw, pipe):
+    """Decode, match and queue trade publishes for a single order"""
+    print(f"📨 Received order: {raw[:100]!r}...")
     
-    def match_ioc_order(self, order, book):
-        """IOC order - immediate-or-cancel, partial fills allowed"""
-        counter_side = "sell" if order.side == "buy" else "buy"
-        
-        while order.remaining_quantity > 0:
-            best_price = book.get_best_ask() if order.side == "buy" else book.get_best_bid()
-            
-            if best_price is None:
-                break
-            
-            # Check price limit
-            is_marketable = False
-            if order.side == "buy":
-                is_marketable = order.price >= best_price
-            else:
-                is_marketable = order.price <= best_price
-            
-            if not is_marketable:
-                break
-            
-            orders_at_price = book.get_orders_at_price(counter_side, best_price)
-            if not orders_at_price:
-                break
-            
-            resting_order = orders_at_price[0]
-            fill_qty = min(order.remaining_quantity, resting_order.remaining_quantity)
-            
-            trade = self.generate_trade(resting_order, order, fill_qty)
-            self.trade_history.append(trade)
-            
-            order.remaining_quantity -= fill_qty
-            resting_order.remaining_quantity -= fill_qty
-            
-            if resting_order.remaining_quantity == 0:
-                book.cancel_order(resting_order.id)
-        
-        # IOC never rests - remaining quantity is cancelled
+    # Decode payload (msgpack or JSON)
+    order_data = decode_order(raw)
     
-    def match_fok_order(self, order, book):
-        """FOK order - fill-or-kill, all-or-nothing"""
-        counter_side = "sell" if order.side == "buy" else "buy"
-        
-        # Pre-check: Can we fill the entire order?
-        available_qty = 0.0
-        book_copy = self.bids if counter_side == "buy" else self.asks
-        
-        for price in sorted(book_copy.keys(), reverse=(counter_side == "buy")):
-            # Check price limit
-            is_acceptable = False
-            if order.side == "buy":
-                is_acceptable = order.price >= price
-            else:
-                is_acceptable = order.price <= price
-            
-            if not is_acceptable:
-                break
-            
-            level = book_copy[price]
-            available_qty += level.total_quantity
-            
-            if available_qty >= order.quantity:
-                break
-        
-        if available_qty < order.quantity:
-            # Cannot fill completely - cancel entire order
-            return
+    # Create Order object (recycled from the pool when possible)
+    order = engine.order_pool.alloc(
+        id=order_data["id"],
+        symbol=order_data["symbol"],
+        side=order_data["side"],
+        order_type=order_data["order_type"],
+        price=order_data.get("price"),
+        quantity=order_data["quantity"],
+        timestamp=order_data["timestamp"],
+        symbol_id=engine.get_symbol_id(order_data["symbol"])
+    )
+    
+    print(f"🔍 Processing {order.side.upper()} {order.order_type.upper()} "
+          f"{order.quantity} {order.symbol} (ID: {order.id[:8]}...)")
+    
+    # Process order through matching engine
+    engine.process_order(order)
+    
+    if engine.order_books[order.symbol_id].aggregate_only:
+        # Only the size was recorded (limit) or nothing at all - the Order is never referenced
+        engine.order_pool.release(order)
+        if order.order_type == "limit":
+            print(f"   📊 Added to aggregate book ({order.symbol} is market-data only, no matching)")
+        else:
+            print(f"   ⏭️  Ignored {order.order_type.upper()} order: "
+                  f"{order.symbol} is market-data only (no matching)")
+        print()
+        return
+    
+    # Get generated trades
+    trades = engine.get_recent_trades()
+    
+    # Taker didn't rest on the book - recycle it
+    if order.remaining_quantity == 0 or order.order_type != "limit":
+        engine.order_pool.release(order)
+    
+    if not trades:
+        print("   📝 Order rested on book (no immediate match)")
+    else:
+        print(f"   ✅ Generated {len(trades)} trade(s)")
         
-        # Can fill - proceed with matching
-        while order.remaining_quantity > 0:
-            best_price = book.get_best_ask() if order.side == "buy" else book.get_best_bid()
-            
-            orders_at_price = book.get_orders_at_price(counter_side, best_price)
-            if not orders_at_price:
-                break
-            
-            resting_order = orders_at_price[0]
-            fill_qty = min(order.remaining_quantity, resting_order.remaining_quantity)
-            
-            trade = self.generate_trade(resting_order, order, fill_qty)
-            self.trade_history.append(trade)
-            
-            order.remaining_quantity -= fill_qty
-            resting_order.remaining_quantity -= fill_qty
+        # Queue each trade publish on the batch pipeline
+        for trade in trades:
+            trade_json = json.dumps(trade)
+            pipe.publish(f"trade_events:{trade['symbol']}", trade_json)
             
-            if resting_order.remaining_quantity == 0:
-                book.cancel_order(resting_order.id)
+            print(f"      💰 Trade {trade['trade_id']}: "
+                  f"{trade['quantity']} @ ${trade['price']}")
     
-    def get_recent_trades(self):
-        """Get trades since last call (and clear)"""
-        trades = self.trade_history.copy()
-        self.trade_history.clear()
-        return trades
+    print()
 
 
-def main():
-    """Main event loop"""
+async def main():
+    """Main event loop - matching of batch N+1 overlaps the publish of batch N"""
     print("🚀 GoQuant Python Engine Wrapper")
     print("=" * 50)
     print("Connecting to Redis...")
     
-    # Connect to Redis
-    redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+    # Connect to Redis (raw bytes go straight into the decoder)
+    redis_client = aioredis.Redis(host='localhost', port=6379, db=0, decode_responses=False)
     
     try:
-        redis_client.ping()
+        await redis_client.ping()
         print("✅ Connected to Redis at localhost:6379")
     except redis.ConnectionError:
         print("❌ ERROR: Cannot connect to Redis")
@@ -328,67 +440,67 @@ def main():
     print("   Press Ctrl+C to stop")
     print()
     
+    # Publish of the previous batch, still in flight
+    publish_task = None
+    
     # Main event loop
-    while True:
-        try:
-            # BLPOP order from queue (blocking, 1 second timeout)
-            result = redis_client.blpop("order_queue", timeout=1)
-            
-            if result is None:
-                # Timeout - no orders
-                continue
-            
-            _, order_json_str = result
-            print(f"📨 Received order: {order_json_str[:100]}...")
-            
-            # Parse JSON
-            order_data = json.loads(order_json_str)
-            
-            # Create Order object
-            order = Order(
-                id=order_data["id"],
-                symbol=order_data["symbol"],
-                side=order_data["side"],
-                order_type=order_data["order_type"],
-                price=order_data.get("price"),
-                quantity=order_data["quantity"],
-                timestamp=order_data["timestamp"]
-            )
-            
-            print(f"🔍 Processing {order.side.upper()} {order.order_type.upper()} "
-                  f"{order.quantity} {order.symbol} (ID: {order.id[:8]}...)")
-            
-            # Process order through matching engine
-            engine.process_order(order)
-            
-            # Get generated trades
-            trades = engine.get_recent_trades()
-            
-            if not trades:
-                print("   📝 Order rested on book (no immediate match)")
-            else:
-                print(f"   ✅ Generated {len(trades)} trade(s)")
+    try:
+        while True:
+            try:
+                # BLPOP order from queue (blocking, 1 second timeout)
+                result = await redis_client.blpop("order_queue", timeout=1)
                 
-                # Publish each trade to Redis
-                for trade in trades:
-                    trade_json = json.dumps(trade)
-                    redis_client.publish("trade_events", trade_json)
-                    
-                    print(f"      💰 Trade {trade['trade_id']}: "
-                          f"{trade['quantity']} @ ${trade['price']}")
-            
-            print()
-            
-        except KeyboardInterrupt:
-            print("\n👋 Shutting down gracefully...")
-            break
-        except Exception as e:
-            print(f"❌ Error processing order: {e}")
-            import traceback
-            traceback.print_exc()
-            # Continue processing next order
+                if result is None:
+                    # Timeout - no orders
+                    continue
+                
+                # Drain whatever else is queued in one round trip
+                _, raw = result
+                batch = [raw]
+                try:
+                    batch.extend(await redis_client.lpop("order_queue", BATCH_SIZE - 1) or [])
+                except redis.RedisError as e:
+                    # LPOP count needs Redis 6.2+; never lose the order BLPOP already took
+                    print(f"⚠️  Batch drain failed, processing single order: {e}")
+                
+                pipe = redis_client.pipeline(transaction=False)
+                
+                for raw in batch:
+                    try:
+                        process_order_payload(engine, raw, pipe)
+                    except Exception as e:
+                        print(f"❌ Error processing order: {e}")
+                        import traceback
+                        traceback.print_exc()
+                        # Continue processing next order
+                
+                # Keep trade order across batches: previous publish lands first
+                # A failed publish is logged, never allowed to drop this batch's trades
+                if publish_task is not None:
+                    previous, publish_task = publish_task, None
+                    try:
+                        await previous
+                    except Exception as e:
+                        print(f"❌ Error publishing trades: {e}")
+                
+                # Publish all trades from the batch in one round trip, in the background
+                publish_task = asyncio.create_task(pipe.execute())
+                
+            except Exception as e:
+                print(f"❌ Error processing batch: {e}")
+                import traceback
+                traceback.print_exc()
+    finally:
+        if publish_task is not None:
+            try:
+                await publish_task
+            except Exception as e:
+                print(f"❌ Error publishing trades: {e}")
+        await redis_client.aclose()
 
 
 if __name__ == "__main__":
-    main()
-
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down gracefully...")
@@ -0,0 +1,295 @@
+"""
+Python Engine Wrapper Tests
+Regression tests for the generated matchers, the Order pool and the
+aggregate-only order book
+
+Test Strategy:
+- Drive MatchingEngine.process_order directly (no Redis)
+- Follow AAA pattern: Arrange, Act, Assert
+"""
+
+import pytest
+import json
+import msgpack
+from unittest.mock import Mock
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from engine_wrapper import (
+    AggregateOrderBook, MatchingEngine, Order, decode_order, process_order_payload
+)
+
+
+SYMBOL = "BTC-USDT"
+
+
+# Engine fixture
+@pytest.fixture
+def engine():
+    """Fresh matching engine"""
+    return MatchingEngine()
+
+
+def submit(engine, order_id, side, order_type, quantity, price=None):
+    """Allocate an order from the engine's pool, match it and return it"""
+    order = engine.order_pool.alloc(
+        id=order_id,
+        symbol=SYMBOL,
+        side=side,
+        order_type=order_type,
+        price=price,
+        quantity=quantity,
+        timestamp=1,
+    )
+    engine.process_order(order)
+    return order
+
+
+# Test 1: FOK with insufficient liquidity is killed untouched
+def test_fok_partial_liquidity_is_killed(engine):
+    """
+    Test Case 1: FOK against partial liquidity
+    
+    Given: 1.0 resting at 100 and 1.0 resting at 101
+    When: FOK buy 2.0 limited to 100 (only 1.0 is marketable)
+    Then: No trades, and the book is left exactly as it was
+    """
+    # Arrange
+    submit(engine, "ask-100", "sell", "limit", "1.0", "100")
+    submit(engine, "ask-101", "sell", "limit", "1.0", "101")
+    book = engine.get_book(SYMBOL)
+    
+    # Act
+    submit(engine, "fok", "buy", "fok", "2.0", "100")
+    
+    # Assert
+    assert engine.get_recent_trades() == []
+    assert book.asks[100.0].total_quantity == 1.0
+    assert book.asks[101.0].total_quantity == 1.0
+    assert [o.id for o in book.asks[100.0].orders] == ["ask-100"]
+    assert "fok" not in book.order_index
+
+
+# Test 2: FOK fills completely when enough liquidity exists across levels
+def test_fok_fills_across_levels(engine):
+    """
+    Test Case 2: FOK with enough marketable liquidity
+    
+    Given: 1.0 resting at 100 and 1.0 resting at 101
+    When: FOK buy 2.0 limited to 101
+    Then: Both makers fill, best price first, and the asks are empty
+    """
+    # Arrange
+    submit(engine, "ask-100", "sell", "limit", "1.0", "100")
+    submit(engine, "ask-101", "sell", "limit", "1.0", "101")
+    
+    # Act
+    submit(engine, "fok", "buy", "fok", "2.0", "101")
+    
+    # Assert
+    trades = engine.get_recent_trades()
+    assert [(t["maker_order_id"], t["price"], t["quantity"]) for t in trades] == [
+        ("ask-100", "100.0", "1.0"),
+        ("ask-101", "101.0", "1.0"),
+    ]
+    assert not engine.get_book(SYMBOL).asks
+
+
+# Test 3: A partially filled maker's level total is kept in sync
+def test_maker_partial_fill_then_fok(engine):
+    """
+    Test Case 3: FOK sees the level size left after a partial maker fill
+    
+    Given: Sell 2.0 at 100, partially filled by a 1.5 limit buy
+    When: FOK buy 1.0 at 100, then FOK buy 0.5 at 100
+    Then: The first is killed (only 0.5 left), the second fills the remainder
+    """
+    # Arrange
+    submit(engine, "maker", "sell", "limit", "2.0", "100")
+    submit(engine, "taker", "buy", "limit", "1.5", "100")
+    book = engine.get_book(SYMBOL)
+    assert book.asks[100.0].total_quantity == 0.5
+    engine.get_recent_trades()
+    
+    # Act / Assert: too large - killed
+    submit(engine, "fok-1", "buy", "fok", "1.0", "100")
+    assert engine.get_recent_trades() == []
+    assert book.asks[100.0].total_quantity == 0.5
+    
+    # Act / Assert: exactly the remainder - filled
+    submit(engine, "fok-2", "buy", "fok", "0.5", "100")
+    trades = engine.get_recent_trades()
+    assert [(t["maker_order_id"], t["quantity"]) for t in trades] == [("maker", "0.5")]
+    assert not book.asks
+    assert "maker" not in book.order_index
+
+
+# Test 4: Fully filled makers are recycled through the pool
+def test_pool_reuse_after_full_fill(engine):
+    """
+    Test Case 4: Order pool recycling
+    
+    Given: A resting sell that is fully filled by a market buy
+    When: The next order is allocated
+    Then: It reuses the released maker object with fresh fields,
+          and the book no longer references it
+    """
+    # Arrange
+    maker = submit(engine, "maker", "sell", "limit", "1.0", "100")
+    submit(engine, "taker", "buy", "market", "1.0")
+    book = engine.get_book(SYMBOL)
+    assert maker in engine.order_pool.free
+    assert not book.asks and "maker" not in book.order_index
+    
+    # Act
+    reused = submit(engine, "next", "buy", "limit", "3.0", "99")
+    
+    # Assert
+    assert reused is maker
+    assert (reused.id, reused.side, reused.price) == ("next", "buy", 99.0)
+    assert reused.remaining_quantity == 3.0
+    assert book.bids[99.0].orders[0] is reused
+    assert engine.get_recent_trades()[0]["maker_order_id"] == "maker"
+
+
+# Test 5: Market-data-only symbols aggregate liquidity and never match
+def test_aggregate_symbol_never_matches():
+    """
+    Test Case 5: Aggregate-only book via the engine
+    
+    Given: An engine with AGG as a market-data-only symbol
+    When: Crossing limit orders and a market order arrive for AGG
+    Then: Limit sizes aggregate per level and no trades are produced
+    """
+    # Arrange
+    engine = MatchingEngine(market_data_only_symbols=frozenset({"AGG"}))
+    
+    # Act
+    for order_id, side, order_type, price, quantity in (
+        ("a1", "sell", "limit", "100", "1.0"),
+        ("a2", "sell", "limit", "100", "2.0"),
+        ("b1", "buy", "limit", "101", "1.5"),
+        ("m1", "buy", "market", None, "5.0"),
+    ):
+        engine.process_order(Order(order_id, "AGG", side, order_type, price, quantity, 1))
+    
+    # Assert
+    book = engine.get_book("AGG")
+    assert isinstance(book, AggregateOrderBook)
+    assert engine.get_recent_trades() == []
+    assert dict(book.asks) == {100.0: 3.0}
+    assert dict(book.bids) == {101.0: 1.5}
+
+
+# Test 6: Aggregate add/cancel bookkeeping
+def test_aggregate_add_cancel():
+    """
+    Test Case 6: AggregateOrderBook add_order / cancel_order
+    
+    Given: 3.0 aggregated at 100 on the bid side
+    When: Cancel part, then the rest, then an unknown level
+    Then: The level shrinks, is dropped when empty, and unknown cancels fail
+    """
+    # Arrange
+    book = AggregateOrderBook()
+    book.add_order("buy", 100.0, 1.0)
+    book.add_order("buy", 100.0, 2.0)
+    book.add_order("buy", 99.0, 1.0)
+    assert book.get_best_bid() == 100.0
+    
+    # Act / Assert: partial cancel
+    assert book.cancel_order("buy", 100.0, 1.0) is True
+    assert book.bids[100.0] == 2.0
+    
+    # Act / Assert: cancel the rest drops the level
+    assert book.cancel_order("buy", 100.0, 2.0) is True
+    assert 100.0 not in book.bids
+    assert book.get_best_bid() == 99.0
+    
+    # Act / Assert: unknown level
+    assert book.cancel_order("sell", 100.0, 1.0) is False
+    assert book.get_best_ask() is None
+
+
+# Test 7: Queue payloads decode from both wire formats
+@pytest.mark.parametrize("encode", [
+    msgpack.packb,
+    lambda order: json.dumps(order).encode(),
+    lambda order: b"\n " + json.dumps(order).encode(),  # Leading whitespace is still JSON
+], ids=["msgpack", "json", "json-leading-whitespace"])
+def test_decode_order_round_trip(encode):
+    """
+    Test Case 7: decode_order on msgpack and JSON payloads
+    
+    Given: The same order encoded as msgpack, JSON, and whitespace-prefixed JSON
+    When: decode_order is called on the raw bytes
+    Then: Every payload decodes back to the original order
+    """
+    # Arrange
+    order = {"id": "o-1", "symbol": SYMBOL, "side": "buy", "order_type": "limit",
+             "price": "100", "quantity": "1.5", "timestamp": 1}
+    
+    # Act / Assert
+    assert decode_order(encode(order)) == order
+
+
+# Test 8: Mixed-format payloads match against each other
+def test_process_order_payload_mixed_formats(engine):
+    """
+    Test Case 8: process_order_payload with msgpack maker and JSON taker
+    
+    Given: A msgpack-encoded resting sell
+    When: A JSON-encoded crossing buy is processed
+    Then: One trade is queued on the symbol's trade channel
+    """
+    # Arrange
+    pipe = Mock()
+    maker = {"id": "maker-1", "symbol": SYMBOL, "side": "sell", "order_type": "limit",
+             "price": "100", "quantity": "1.0", "timestamp": 1}
+    taker = {"id": "taker-1", "symbol": SYMBOL, "side": "buy", "order_type": "limit",
+             "price": "100", "quantity": "1.0", "timestamp": 2}
+    
+    # Act
+    process_order_payload(engine, msgpack.packb(maker), pipe)
+    process_order_payload(engine, json.dumps(taker).encode(), pipe)
+    
+    # Assert
+    pipe.publish.assert_called_once()
+    channel, payload = pipe.publish.call_args.args
+    trade = json.loads(payload)
+    assert channel == f"trade_events:{SYMBOL}"
+    assert (trade["maker_order_id"], trade["taker_order_id"]) == ("maker-1", "taker-1")
+
+
+# Test 9: Aggregate-only payloads are logged as aggregated/ignored, never as resting
+def test_process_order_payload_aggregate_symbol(capsys):
+    """
+    Test Case 9: process_order_payload on a market-data-only symbol
+    
+    Given: An engine with AGG as a market-data-only symbol
+    When: A limit and then a market order for AGG are processed
+    Then: The limit is reported as aggregated, the market order as ignored,
+          nothing is published, and the Order object is recycled through the pool
+    """
+    # Arrange
+    engine = MatchingEngine(market_data_only_symbols=frozenset({"AGG"}))
+    pipe = Mock()
+    limit = {"id": "agg-limit", "symbol": "AGG", "side": "sell", "order_type": "limit",
+             "price": "100", "quantity": "1.0", "timestamp": 1}
+    market = {"id": "agg-market", "symbol": "AGG", "side": "buy", "order_type": "market",
+              "quantity": "1.0", "timestamp": 2}
+    
+    # Act
+    process_order_payload(engine, json.dumps(limit).encode(), pipe)
+    process_order_payload(engine, json.dumps(market).encode(), pipe)
+    
+    # Assert
+    output = capsys.readouterr().out
+    assert "Added to aggregate book" in output
+    assert "Ignored MARKET order" in output
+    assert "rested on book" not in output
+    pipe.publish.assert_not_called()
+    assert len(engine.order_pool.free) == 1  # Released, reused, released again
+    assert dict(engine.get_book("AGG").asks) == {100.0: 1.0}
@@ -3,27 +3,58 @@ GoQuant System Startup Script
 Launches all services in the correct order with proper health checks
 """
 
+import functools
 import subprocess
 import time
 import sys
 import os
+import select
+import threading
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+# Color codes for terminal output (plain text when not writing to a terminal)
+if sys.stdout.isatty():
+    GREEN = "\033[92m"
+    RED = "\033[91m"
+    YELLOW = "\033[93m"
+    BLUE = "\033[94m"
+    RESET = "\033[0m"
+else:
+    GREEN = RED = YELLOW = BLUE = RESET = ""
+
+# Precomputed "[STATUS] " prefixes for print_status
+STATUS_PREFIX = {
+    status: f"{color}[{status.upper()}]{RESET} "
+    for status, color in (
+        ("success", GREEN),
+        ("error", RED),
+        ("warning", YELLOW),
+        ("info", BLUE),
+    )
+}
+
+# Lines of engine output kept for diagnostics
+ENGINE_OUTPUT_TAIL = 200
+
+# Seconds the engine must stay up to count as started
+ENGINE_STARTUP_GRACE = 2
+
+# Engine build configurations, most optimized first
+ENGINE_BUILD_CONFIGS = ("Release", "RelWithDebInfo", "Debug")
 
-# Color codes for terminal output
-GREEN = "\033[92m"
-RED = "\033[91m"
-YELLOW = "\033[93m"
-BLUE = "\033[94m"
-RESET = "\033[0m"
+# Shared keep-alive session for health probes
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
 
 
 def print_status(message, status="info"):
     """Print colored status message"""
-    color = {"success": GREEN, "error": RED, "warning": YELLOW, "info": BLUE}.get(
-        status, RESET
-    )
-    print(f"{color}[{status.upper()}]{RESET} {message}")
+    prefix = STATUS_PREFIX.get(status) or f"{RESET}[{status.upper()}]{RESET} "
+    sys.stdout.write(prefix + message + "\n")
 
 
 def check_redis():
@@ -76,13 +107,18 @@ def start_redis():
         return False
 
 
-def wait_for_service(url, service_name, max_attempts=30):
-    """Wait for service to be healthy"""
+def wait_for_service(url, service_name, timeout=30):
+    """Wait for service to be healthy (exponential backoff, keep-alive probes)"""
     print_status(f"Waiting for {service_name}...", "info")
 
-    for i in range(max_attempts):
+    start = time.monotonic()
+    deadline = start + timeout
+    next_warning = start + 5
+    attempt = 0
+
+    while time.monotonic() < deadline:
         try:
-            response = requests.get(url, timeout=2)
+            response = SESSION.get(url, timeout=0.5)
             if response.status_code in [
                 200,
                 503,
@@ -92,17 +128,99 @@ def wait_for_service(url, service_name, max_attempts=30):
         except requests.exceptions.RequestException:
             pass
 
-        time.sleep(1)
-        if (i + 1) % 5 == 0:
+        time.sleep(min(0.05 * 2**attempt, 0.5))
+        attempt += 1
+        if time.monotonic() >= next_warning:
             print_status(
-                f"Still waiting for {service_name}... ({i + 1}/{max_attempts})",
+                f"Still waiting for {service_name}... "
+                f"({time.monotonic() - start:.0f}s/{timeout}s)",
                 "warning",
             )
+            next_warning += 5
 
     print_status(f"{service_name} failed to start", "error")
     return False
 
 
+def drain_output(stream, sink):
+    """Drain a child's pipe so it never fills up and blocks the child"""
+    for line in stream:
+        sink.append(line)
+
+
+def wait_any_process_dies(procs):
+    """Block until any process exits and return it (no busy polling)"""
+    if hasattr(os, "pidfd_open"):
+        # Linux >= 5.3: a pidfd becomes readable when its process exits
+        fds = {}
+        try:
+            epoll = select.epoll()
+            try:
+                for proc in procs:
+                    fd = os.pidfd_open(proc.pid)
+                    fds[fd] = proc
+                    epoll.register(fd, select.EPOLLIN)
+                while True:
+                    for fd, _ in epoll.poll():
+                        return fds[fd]
+            finally:
+                epoll.close()
+                for fd in fds:
+                    os.close(fd)
+        except OSError:
+            pass  # Kernel without pidfd support - fall back to polling
+
+    elif sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.windll.kernel32
+        # DWORD result: the ctypes default (signed int) would turn WAIT_FAILED into -1
+        kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+        kernel32.WaitForMultipleObjects.argtypes = (
+            wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD,
+        )
+        handles = (wintypes.HANDLE * len(procs))(*(int(p._handle) for p in procs))
+        while True:
+            # Wait in 500ms slices so Ctrl+C is still delivered between calls
+            index = kernel32.WaitForMultipleObjects(len(procs), handles, False, 500)
+            if 0 <= index < len(procs):  # WAIT_OBJECT_0 + i
+                return procs[index]
+            if index == 0xFFFFFFFF:  # WAIT_FAILED - fall back to polling
+                break
+
+    while True:
+        for proc in procs:
+            if proc.poll() is not None:
+                return proc
+        time.sleep(1)
+
+
+def stop_processes(procs, timeout=2):
+    """Terminate processes, returning as soon as they exit; kill any still up after `timeout`"""
+    for proc in procs:
+        proc.terminate()
+
+    deadline = time.monotonic() + timeout
+    for proc in procs:
+        try:
+            proc.wait(timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+@functools.cache
+def find_engine_executable(project_root: Path):
+    """Resolve the built engine_runner.exe once (first matching build config), or None"""
+    build_dir = project_root / "matching-engine" / "build" / "src"
+    for config in ENGINE_BUILD_CONFIGS:
+        engine_exe = build_dir / config / "engine_runner.exe"
+        if engine_exe.is_file():
+            return engine_exe
+    return None
+
+
 def get_python_interpreter(service_dir: Path) -> str:
     """Prefer service local venv's python if available, else current interpreter"""
     venv_python = service_dir / ".venv" / "Scripts" / "python.exe"
@@ -111,6 +229,85 @@ def get_python_interpreter(service_dir: Path) -> str:
     return sys.executable
 
 
+def spawn_order_gateway(project_root, num_workers, log_level):
+    """Launch the Order Gateway (port 8000) without waiting for it"""
+    order_gateway_dir = project_root / "order-gateway"
+
+    # Build uvicorn command with workers
+    uvicorn_cmd = [
+        get_python_interpreter(order_gateway_dir),
+        "-m",
+        "uvicorn",
+        "src.main:app",
+        "--host",
+        "0.0.0.0",
+        "--port",
+        "8000",
+        "--workers", str(num_workers),
+        "--log-level", log_level,
+    ]
+
+    return subprocess.Popen(
+        uvicorn_cmd,
+        cwd=str(order_gateway_dir),
+        stdout=subprocess.DEVNULL,  # Undrained PIPEs stall the child once full
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def spawn_market_data(project_root):
+    """Launch the Market Data Service (port 8001) without waiting for it"""
+    market_data_dir = project_root / "market-data"
+
+    return subprocess.Popen(
+        [
+            get_python_interpreter(market_data_dir),
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--host",
+            "0.0.0.0",
+            "--port",
+            "8001",
+        ],
+        cwd=str(market_data_dir),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def spawn_engine(engine_exe):
+    """Launch the C++ engine, returning (process, drain thread, output tail)"""
+    engine_process = subprocess.Popen(
+        [str(engine_exe)],
+        cwd=str(engine_exe.parent),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+    # Keep the engine's pipe drained; retain the tail for diagnostics
+    engine_output = deque(maxlen=ENGINE_OUTPUT_TAIL)
+    engine_drain = threading.Thread(
+        target=drain_output, args=(engine_process.stdout, engine_output), daemon=True
+    )
+    engine_drain.start()
+
+    return engine_process, engine_drain, engine_output
+
+
+def wait_for_engine(engine_process, grace=ENGINE_STARTUP_GRACE):
+    """The engine has no health endpoint - surviving the grace period counts as ready"""
+    try:
+        engine_process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        print_status("C++ Matching Engine started", "success")
+        return True
+
+    print_status("C++ Engine exited unexpectedly", "error")
+    return False
+
+
 def main():
     """Main startup routine"""
     print()
@@ -138,127 +335,63 @@ def main():
 
     print()
 
-    # Step 2: Start Order Gateway
-    print_status("Step 2: Starting Order Gateway (Port 8000)", "info")
-    order_gateway_dir = project_root / "order-gateway"
-    og_python = get_python_interpreter(order_gateway_dir)
+    # Step 2: Locate the C++ engine before launching anything
+    print_status("Step 2: Locating C++ Matching Engine", "info")
+    engine_exe = find_engine_executable(project_root)
 
-    try:
-        # Build uvicorn command with workers
-        uvicorn_cmd = [
-            og_python,
-            "-m",
-            "uvicorn",
-            "src.main:app",
-            "--host",
-            "0.0.0.0",
-            "--port",
-            "8000",
-            "--workers", str(num_workers),
-            "--log-level", log_level,
-        ]
-        
-        order_gateway_process = subprocess.Popen(
-            uvicorn_cmd,
-            cwd=str(order_gateway_dir),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+    if engine_exe is None:
+        print_status(
+            "Engine executable not found under matching-engine/build/src/"
+            f"{{{','.join(ENGINE_BUILD_CONFIGS)}}}",
+            "error",
         )
-
-        if not wait_for_service("http://localhost:8000/health", "Order Gateway"):
-            print_status("Failed to start Order Gateway", "error")
-            order_gateway_process.kill()
-            return 1
-
-    except Exception as e:
-        print_status(f"Error starting Order Gateway: {e}", "error")
+        print_status("Please build the C++ engine first:", "warning")
+        print_status("  cd matching-engine/build", "info")
+        print_status("  cmake --build . --config Release", "info")
         return 1
 
-    print()
-
-# Step 3: Start Market Data Service
-    print_status("Step 3: Starting Market Data Service (Port 8001)", "info")
-    market_data_dir = project_root / "market-data"
-    md_python = get_python_interpreter(market_data_dir)
-
-    try:
-        market_data_process = subprocess.Popen(
-            [
-                md_python,
-                "-m",
-                "uvicorn",
-                "src.main:app",
-                "--host",
-                "0.0.0.0",
-                "--port",
-                "8001",
-            ],
-            cwd=str(market_data_dir),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-
-        if not wait_for_service("http://localhost:8001/health", "Market Data Service"):
-            print_status("Failed to start Market Data Service", "error")
-            market_data_process.kill()
-            order_gateway_process.kill()
-            return 1
-
-    except Exception as e:
-        print_status(f"Error starting Market Data Service: {e}", "error")
-        order_gateway_process.kill()
-        return 1
+    print_status(f"Using {engine_exe}", "success")
 
     print()
 
-    # Step 4: Start C++ Matching Engine
-    print_status("Step 4: Starting C++ Matching Engine", "info")
-    engine_exe = (
-        project_root
-        / "matching-engine"
-        / "build"
-        / "src"
-        / "Debug"
-        / "engine_runner.exe"
+    # Step 3: Launch everything at once - services only depend on Redis
+    print_status(
+        "Step 3: Launching Order Gateway (Port 8000), Market Data Service (Port 8001) "
+        "and C++ Matching Engine",
+        "info",
     )
+    processes = []
 
-    if not engine_exe.exists():
-        print_status(f"Engine executable not found at {engine_exe}", "error")
-        print_status("Please build the C++ engine first:", "warning")
-        print_status("  cd matching-engine/build", "info")
-        print_status("  cmake --build . --config Debug", "info")
-        market_data_process.kill()
-        order_gateway_process.kill()
+    try:
+        processes.append(spawn_order_gateway(project_root, num_workers, log_level))
+        processes.append(spawn_market_data(project_root))
+        engine_process, engine_drain, engine_output = spawn_engine(engine_exe)
+        processes.append(engine_process)
+    except Exception as e:
+        print_status(f"Error launching services: {e}", "error")
+        for proc in processes:
+            proc.kill()
         return 1
 
-    try:
-        engine_process = subprocess.Popen(
-            [str(engine_exe)],
-            cwd=str(engine_exe.parent),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+    order_gateway_process, market_data_process, engine_process = processes
 
-        time.sleep(2)
+    # Step 4: Wait for all of them concurrently (startup = max, not sum)
+    print_status("Step 4: Waiting for services to become ready", "info")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(wait_for_service, "http://localhost:8000/health", "Order Gateway"),
+            executor.submit(wait_for_service, "http://localhost:8001/health", "Market Data Service"),
+            executor.submit(wait_for_engine, engine_process),
+        ]
+        results = [future.result() for future in futures]
 
+    if not all(results):
         if engine_process.poll() is not None:
-            print_status("C++ Engine exited unexpectedly", "error")
-            stdout, stderr = engine_process.communicate()
-            print(f"STDOUT: {stdout}")
-            print(f"STDERR: {stderr}")
-            market_data_process.kill()
-            order_gateway_process.kill()
-            return 1
-
-        print_status("C++ Matching Engine started", "success")
-
-    except Exception as e:
-        print_status(f"Error starting C++ Engine: {e}", "error")
-        market_data_process.kill()
-        order_gateway_process.kill()
+            engine_drain.join(timeout=1)
+            print(f"OUTPUT: {''.join(engine_output)}")
+        print_status("Failed to start all services", "error")
+        for proc in processes:
+            proc.kill()
         return 1
 
     print()
@@ -279,37 +412,25 @@ def main():
     print()
 
     # Keep running and monitor processes
-    try:
-        while True:
-            time.sleep(1)
+    service_names = {
+        order_gateway_process: "Order Gateway",
+        market_data_process: "Market Data Service",
+        engine_process: "C++ Engine",
+    }
 
-            # Check if any process died
-            if order_gateway_process.poll() is not None:
-                print_status("Order Gateway died unexpectedly", "error")
-                break
-            if market_data_process.poll() is not None:
-                print_status("Market Data Service died unexpectedly", "error")
-                break
-            if engine_process.poll() is not None:
-                print_status("C++ Engine died unexpectedly", "error")
-                break
+    # Push everything out before blocking (print_status doesn't flush per line)
+    sys.stdout.flush()
+
+    try:
+        # Sleeps until a process exits - no per-second wakeups
+        dead_process = wait_any_process_dies(list(service_names))
+        print_status(f"{service_names[dead_process]} died unexpectedly", "error")
 
     except KeyboardInterrupt:
         print()
         print_status("Shutting down all services...", "warning")
 
-        # Graceful shutdown
-        order_gateway_process.terminate()
-        market_data_process.terminate()
-        engine_process.terminate()
-
-        # Wait for termination
-        time.sleep(2)
-
-        # Force kill if still running
-        order_gateway_process.kill()
-        market_data_process.kill()
-        engine_process.kill()
+        stop_processes(processes)
 
         print_status("All services stopped", "success")
 
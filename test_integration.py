@@ -4,25 +4,43 @@ Tests end-to-end order flow from REST API through matching engine
 Implements verification for FR-3.1 (Order submission) and FR-2.1 through FR-2.4 (Order types)
 """
 
+import array
+import asyncio
+import contextvars
+import statistics
 import subprocess
 import time
 import sys
 import json
 import threading
 import queue
+import socket
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
 try:
+    import aiohttp
+    import orjson
     import requests
     import redis
     import websocket
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection
 except ImportError as e:
     print(f"Missing dependency: {e}")
-    print("Install with: pip install requests redis websocket-client")
+    print("Install with: pip install aiohttp orjson requests redis websocket-client")
     sys.exit(1)
 
+from start_system import find_engine_executable, stop_processes
+
+try:
+    import numpy as np  # Optional: vectorized latency percentiles
+except ImportError:
+    np = None
+
 # Configuration
 ORDER_GATEWAY_URL = "http://localhost:8000"
 MARKET_DATA_URL = "http://localhost:8001"
@@ -31,7 +49,10 @@ REDIS_PORT = 6379
 
 # Test configuration
 TEST_TIMEOUT = 30  # seconds
-STARTUP_WAIT = 10  # seconds to wait for services
+PERF_CONCURRENCY = 32  # max in-flight orders in the performance test
+STARTUP_WAIT = 10  # max seconds to wait for services to become healthy
+HEALTH_CACHE_TTL = 0.5  # seconds a healthy probe result is reused
+TEST_KEYS = ("order_queue",)  # Redis keys the tests write and clear before a run
 
 # Color codes for output
 GREEN = "\033[92m"
@@ -41,55 +62,107 @@ BLUE = "\033[94m"
 CYAN = "\033[96m"
 RESET = "\033[0m"
 
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that adds SO_KEEPALIVE to urllib3's defaults (which already set TCP_NODELAY)"""
+
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),  # Detect dead pooled connections
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.SOCKET_OPTIONS
+        return super().init_poolmanager(*args, **kwargs)
+
+
+# Shared keep-alive session for the /health probes
+SESSION = requests.Session()
+SESSION.mount(
+    "http://", KeepAliveAdapter(pool_connections=4, pool_maxsize=64, max_retries=0)
+)
+
+# Shared Redis connection pool (connections are opened lazily and reused)
+REDIS_POOL = redis.ConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, decode_responses=True, max_connections=8
+)
+
+# One test outcome (tuple layout - no per-result dict)
+TestResult = namedtuple("TestResult", "name passed requirement details")
+TestResult.__test__ = False  # Not a pytest test class
+
 # Global tracking
 test_results = []
+_health_cache = {}  # url -> (monotonic timestamp, (ok, redis_status))
+_suite_output = contextvars.ContextVar("suite_output", default=None)
 trades_received = queue.Queue()
 websocket_messages = queue.Queue()
 
 
+def emit(line=""):
+    """Print a line, or buffer it when running inside a concurrent suite"""
+    buffer = _suite_output.get()
+    if buffer is None:
+        print(line)
+    else:
+        buffer.append(line)
+
+
 def print_header(title):
     """Print formatted section header"""
-    print()
-    print("=" * 80)
-    print(f"  {BLUE}{title}{RESET}")
-    print("=" * 80)
-    print()
+    emit()
+    emit("=" * 80)
+    emit(f"  {BLUE}{title}{RESET}")
+    emit("=" * 80)
+    emit()
 
 
 def print_test(test_name, passed, details="", requirement=""):
     """Print test result with optional requirement reference"""
     status = f"{GREEN}✓ PASS{RESET}" if passed else f"{RED}✗ FAIL{RESET}"
     req_str = f" [{CYAN}{requirement}{RESET}]" if requirement else ""
-    print(f"{status} {test_name}{req_str}")
+    emit(f"{status} {test_name}{req_str}")
     if details:
-        print(f"       {details}")
+        emit(f"       {details}")
 
     # Track results
-    test_results.append(
-        {
-            "name": test_name,
-            "passed": passed,
-            "requirement": requirement,
-            "details": details,
-        }
-    )
+    test_results.append(TestResult(test_name, passed, requirement, details))
 
 
-def check_service_health(service_name, url):
-    """Check if a service is healthy"""
+def check_service_health(service_name, url, timeout=2):
+    """Check if a service is healthy (healthy results cached for HEALTH_CACHE_TTL)"""
+    now = time.monotonic()
+    cached = _health_cache.get(url)
+    if cached is not None and now - cached[0] < HEALTH_CACHE_TTL:
+        return cached[1]
+
     try:
-        response = requests.get(f"{url}/health", timeout=2)
+        response = SESSION.get(f"{url}/health", timeout=timeout)
         if response.status_code in [200, 503]:  # 503 is OK if Redis issue
             data = response.json()
             redis_status = data.get("redis", "unknown")
-            return True, redis_status
+            result = (True, redis_status)
+            _health_cache[url] = (now, result)
+            return result
         return False, "unhealthy"
     except Exception as e:
         return False, str(e)
 
 
-def start_services():
-    """Start all services and verify they're running"""
+def wait_until_healthy(service_name, url, timeout=STARTUP_WAIT):
+    """Poll a service's health with backoff until it responds or `timeout` expires"""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+
+    while True:
+        ok, redis_status = check_service_health(service_name, url, timeout=0.2)
+        if ok or time.monotonic() >= deadline:
+            return ok, redis_status
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.5)
+
+
+def start_services(reset=False):
+    """Start all services and verify they're running (reset=True wipes the whole Redis DB)"""
     print_header("Starting Services")
 
     project_root = Path(__file__).parent
@@ -97,13 +170,17 @@ def start_services():
 
     # Check Redis
     try:
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+        r = redis.Redis(connection_pool=REDIS_POOL)
         r.ping()
         print(f"{GREEN}✓{RESET} Redis is running")
 
-        # Clear any old data
-        r.flushall()
-        print(f"  Cleared Redis data")
+        # Clear old test data - UNLINK frees it off the main thread
+        if reset:
+            r.flushdb()
+            print(f"  Cleared Redis database (--reset)")
+        else:
+            r.unlink(*TEST_KEYS)
+            print(f"  Cleared Redis keys: {', '.join(TEST_KEYS)}")
     except Exception as e:
         print(f"{RED}✗{RESET} Redis not running: {e}")
         print("  Start Redis with: docker start redis")
@@ -123,9 +200,8 @@ def start_services():
             "8000",
         ],
         cwd=str(project_root / "order-gateway"),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
+        stdout=subprocess.DEVNULL,  # Nobody reads these; a full PIPE would stall the child
+        stderr=subprocess.DEVNULL,
     )
     processes.append(("Order Gateway", order_gateway_process))
 
@@ -143,41 +219,36 @@ def start_services():
             "8001",
         ],
         cwd=str(project_root / "market-data"),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
+        stdout=subprocess.DEVNULL,  # Nobody reads these; a full PIPE would stall the child
+        stderr=subprocess.DEVNULL,
     )
     processes.append(("Market Data", market_data_process))
 
     # Start C++ Matching Engine
-    engine_exe = (
-        project_root
-        / "matching-engine"
-        / "build"
-        / "src"
-        / "Debug"
-        / "engine_runner.exe"
-    )
-    if engine_exe.exists():
+    engine_exe = find_engine_executable(project_root)
+    if engine_exe is not None:
         print(f"Starting C++ Matching Engine...")
         engine_process = subprocess.Popen(
             [str(engine_exe)],
             cwd=str(engine_exe.parent),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
         )
         processes.append(("Matching Engine", engine_process))
     else:
-        print(f"{YELLOW}⚠{RESET} C++ Engine not found at {engine_exe}")
+        print(f"{YELLOW}⚠{RESET} C++ Engine not found under matching-engine/build/src")
 
-    # Wait for services to start
-    print(f"Waiting {STARTUP_WAIT} seconds for services to initialize...")
-    time.sleep(STARTUP_WAIT)
-
-    # Check health
-    gateway_ok, gateway_redis = check_service_health("Order Gateway", ORDER_GATEWAY_URL)
-    market_ok, market_redis = check_service_health("Market Data", MARKET_DATA_URL)
+    # Wait for both services to become healthy (concurrently, up to STARTUP_WAIT)
+    print(f"Waiting up to {STARTUP_WAIT} seconds for services to initialize...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        gateway_future = executor.submit(
+            wait_until_healthy, "Order Gateway", ORDER_GATEWAY_URL
+        )
+        market_future = executor.submit(
+            wait_until_healthy, "Market Data", MARKET_DATA_URL
+        )
+        gateway_ok, gateway_redis = gateway_future.result()
+        market_ok, market_redis = market_future.result()
 
     print()
     print("Service Status:")
@@ -188,13 +259,27 @@ def start_services():
         f"  Market Data:   {'✓ Running' if market_ok else '✗ Not responding'} (Redis: {market_redis})"
     )
     print(
-        f"  C++ Engine:    {'✓ Started' if engine_exe.exists() else '✗ Not available'}"
+        f"  C++ Engine:    {'✓ Started' if engine_exe is not None else '✗ Not available'}"
     )
 
     return gateway_ok and market_ok, processes
 
 
-def test_order_submission():
+async def post_order(session, order):
+    """POST an order to the gateway, returning (status, JSON body or None)"""
+    async with session.post(
+        f"{ORDER_GATEWAY_URL}/v1/orders",
+        data=orjson.dumps(order),
+        headers={"Content-Type": "application/json"},
+    ) as response:
+        try:
+            data = await response.json(loads=orjson.loads)
+        except (aiohttp.ContentTypeError, json.JSONDecodeError):
+            data = None
+        return response.status, data
+
+
+async def test_order_submission(session):
     """Test FR-3.1: Order submission endpoint"""
     print_header("Test Suite 1: Order Submission (FR-3.1)")
 
@@ -207,12 +292,9 @@ def test_order_submission():
     }
 
     try:
-        response = requests.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-        )
+        status, data = await post_order(session, order)
 
-        if response.status_code == 201:
-            data = response.json()
+        if status == 201:
             order_id = data.get("order_id")
             print_test(
                 "Market order submission",
@@ -224,7 +306,7 @@ def test_order_submission():
             print_test(
                 "Market order submission",
                 False,
-                f"HTTP {response.status_code}",
+                f"HTTP {status}",
                 "FR-2.1",
             )
     except Exception as e:
@@ -240,17 +322,15 @@ def test_order_submission():
     }
 
     try:
-        response = requests.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-        )
+        status, data = await post_order(session, order)
 
-        if response.status_code == 201:
+        if status == 201:
             print_test("Limit order submission", True, f"Order accepted", "FR-2.2")
         else:
             print_test(
                 "Limit order submission",
                 False,
-                f"HTTP {response.status_code}",
+                f"HTTP {status}",
                 "FR-2.2",
             )
     except Exception as e:
@@ -266,15 +346,13 @@ def test_order_submission():
     }
 
     try:
-        response = requests.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-        )
+        status, data = await post_order(session, order)
 
-        if response.status_code == 201:
+        if status == 201:
             print_test("IOC order submission", True, f"Order accepted", "FR-2.3")
         else:
             print_test(
-                "IOC order submission", False, f"HTTP {response.status_code}", "FR-2.3"
+                "IOC order submission", False, f"HTTP {status}", "FR-2.3"
             )
     except Exception as e:
         print_test("IOC order submission", False, str(e), "FR-2.3")
@@ -289,21 +367,19 @@ def test_order_submission():
     }
 
     try:
-        response = requests.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-        )
+        status, data = await post_order(session, order)
 
-        if response.status_code == 201:
+        if status == 201:
             print_test("FOK order submission", True, f"Order accepted", "FR-2.4")
         else:
             print_test(
-                "FOK order submission", False, f"HTTP {response.status_code}", "FR-2.4"
+                "FOK order submission", False, f"HTTP {status}", "FR-2.4"
             )
     except Exception as e:
         print_test("FOK order submission", False, str(e), "FR-2.4")
 
 
-def test_validation():
+async def test_validation(session):
     """Test input validation"""
     print_header("Test Suite 2: Input Validation")
 
@@ -316,13 +392,11 @@ def test_validation():
     }
 
     try:
-        response = requests.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-        )
+        status, data = await post_order(session, order)
         print_test(
             "Invalid order type rejection",
-            response.status_code == 422,
-            f"HTTP {response.status_code}",
+            status == 422,
+            f"HTTP {status}",
         )
     except Exception as e:
         print_test("Invalid order type rejection", False, str(e))
@@ -337,13 +411,11 @@ def test_validation():
     }
 
     try:
-        response = requests.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-        )
+        status, data = await post_order(session, order)
         print_test(
             "Missing limit price rejection",
-            response.status_code == 422,
-            f"HTTP {response.status_code}",
+            status == 422,
+            f"HTTP {status}",
         )
     except Exception as e:
         print_test("Missing limit price rejection", False, str(e))
@@ -357,24 +429,22 @@ def test_validation():
     }
 
     try:
-        response = requests.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-        )
+        status, data = await post_order(session, order)
         print_test(
             "Negative quantity rejection",
-            response.status_code == 422,
-            f"HTTP {response.status_code}",
+            status == 422,
+            f"HTTP {status}",
         )
     except Exception as e:
         print_test("Negative quantity rejection", False, str(e))
 
 
-def test_redis_queue():
+async def test_redis_queue(session):
     """Test that orders are queued in Redis"""
     print_header("Test Suite 3: Redis Queue Integration")
 
     try:
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+        r = redis.Redis(connection_pool=REDIS_POOL)
 
         # Clear queue
         r.delete("order_queue")
@@ -388,33 +458,39 @@ def test_redis_queue():
             "quantity": "0.1",
         }
 
-        response = requests.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-        )
+        status, data = await post_order(session, order)
 
-        if response.status_code == 201:
-            # Check queue
-            time.sleep(0.5)  # Allow time for queue operation
-            queue_length = r.llen("order_queue")
+        if status == 201:
+            # Wait for this order to land (up to 0.5s) instead of a fixed sleep;
+            # match on the gateway's order_id, since other orders may be queued too
+            order_id = data.get("order_id")
+            order_data = None
+            for _ in range(50):
+                for message in r.lrange("order_queue", 0, -1):
+                    try:
+                        queued = orjson.loads(message)
+                    except json.JSONDecodeError:
+                        continue
+                    if queued.get("id") == order_id:
+                        order_data = queued
+                        break
+                if order_data is not None:
+                    break
+                await asyncio.sleep(0.01)
 
             print_test(
                 "Order queued to Redis",
-                queue_length > 0,
-                f"Queue length: {queue_length}",
+                order_data is not None,
+                f"Order ID: {order_id}",
             )
 
-            # Peek at message
-            if queue_length > 0:
-                message = r.lindex("order_queue", -1)
-                try:
-                    order_data = json.loads(message)
-                    print_test(
-                        "Order format valid",
-                        "id" in order_data and "symbol" in order_data,
-                        f"Order has ID: {order_data.get('id', 'missing')[:8]}...",
-                    )
-                except json.JSONDecodeError:
-                    print_test("Order format valid", False, "Invalid JSON in queue")
+            # Check the queued message
+            if order_data is not None:
+                print_test(
+                    "Order format valid",
+                    "id" in order_data and "symbol" in order_data,
+                    f"Order has ID: {order_data['id'][:8]}...",
+                )
         else:
             print_test("Order queued to Redis", False, f"Order submission failed")
 
@@ -422,50 +498,97 @@ def test_redis_queue():
         print_test("Redis queue test", False, str(e))
 
 
+async def submit_orders_concurrently(payloads, concurrency=PERF_CONCURRENCY):
+    """Submit pre-serialized orders with at most `concurrency` in flight, returning (latency_ns, status) per order"""
+    url = f"{ORDER_GATEWAY_URL}/v1/orders"
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(session, payload):
+        async with semaphore:
+            order_start = time.perf_counter_ns()
+            try:
+                async with session.post(url, data=payload) as response:
+                    await response.read()
+                    return time.perf_counter_ns() - order_start, response.status
+            except Exception:
+                return None, None
+
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=64),
+        timeout=aiohttp.ClientTimeout(total=5),
+        headers={"Content-Type": "application/json"},
+    ) as session:
+        return await asyncio.gather(*(submit(session, payload) for payload in payloads))
+
+
+async def run_buffered(suite, session):
+    """Run a suite with its output captured, so concurrent suites don't interleave"""
+    buffer = []
+    _suite_output.set(buffer)  # Each gathered task has its own context copy
+    await suite(session)
+    return buffer
+
+
+async def run_independent_suites():
+    """Run the HTTP-only suites concurrently, then print their output in order
+
+    The Redis queue suite inspects (and clears) order_queue, which the order
+    submission suite also pushes to, so it runs on its own afterwards.
+    """
+    async with aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=5)
+    ) as session:
+        outputs = await asyncio.gather(
+            run_buffered(test_order_submission, session),
+            run_buffered(test_validation, session),
+        )
+
+        for lines in outputs:
+            print("\n".join(lines))
+
+        await test_redis_queue(session)
+
+
 def test_performance():
     """Test NFR-1: Performance requirements"""
     print_header("Test Suite 4: Performance (NFR-1)")
 
     num_orders = 100
-    start_time = time.time()
-    successful = 0
-    failed = 0
-    latencies = []
 
-    print(f"Submitting {num_orders} orders...")
-
-    for i in range(num_orders):
-        order = {
+    # Build and serialize every order up front, outside the timed region
+    payloads = [
+        orjson.dumps({
             "symbol": "BTC-USDT",
             "order_type": "limit",
             "side": "buy" if i % 2 == 0 else "sell",
             "price": f"{60000 + (i % 100)}",
             "quantity": "0.01",
-        }
+        })
+        for i in range(num_orders)
+    ]
 
-        order_start = time.time()
-        try:
-            response = requests.post(
-                f"{ORDER_GATEWAY_URL}/v1/orders", json=order, timeout=5
-            )
-            order_end = time.time()
+    print(f"Submitting {num_orders} orders ({PERF_CONCURRENCY} concurrent)...")
 
-            latency_ms = (order_end - order_start) * 1000
-            latencies.append(latency_ms)
+    start_ns = time.perf_counter_ns()
+    results = asyncio.run(submit_orders_concurrently(payloads))
+    end_ns = time.perf_counter_ns()
 
-            if response.status_code == 201:
-                successful += 1
-            else:
-                failed += 1
-        except Exception:
+    successful = 0
+    failed = 0
+    latencies = array.array("Q")  # integer nanoseconds, 8 bytes per sample
+    for latency_ns, status in results:
+        if latency_ns is None:
             failed += 1
+            continue
 
-        # Progress indicator
-        if (i + 1) % 20 == 0:
-            print(f"  Progress: {i + 1}/{num_orders}")
+        latencies.append(latency_ns)
 
-    end_time = time.time()
-    total_time = end_time - start_time
+        if status == 201:
+            successful += 1
+        else:
+            failed += 1
+
+    total_time = (end_ns - start_ns) / 1e9
     throughput = num_orders / total_time if total_time > 0 else 0
 
     print()
@@ -476,17 +599,27 @@ def test_performance():
     print(f"  Throughput:  {throughput:.1f} orders/sec")
 
     if latencies:
-        avg_latency = sum(latencies) / len(latencies)
-        min_latency = min(latencies)
-        max_latency = max(latencies)
-        print(f"  Avg latency: {avg_latency:.1f}ms")
-        print(f"  Min latency: {min_latency:.1f}ms")
-        print(f"  Max latency: {max_latency:.1f}ms")
+        if np is not None:
+            samples = np.frombuffer(latencies, dtype=np.uint64)  # Zero-copy view
+            avg, lowest, highest = samples.mean(), samples.min(), samples.max()
+            p50, p99 = np.percentile(samples, [50, 99])
+        else:
+            avg, lowest, highest = statistics.mean(latencies), min(latencies), max(latencies)
+            p50 = statistics.median(latencies)
+            p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) >= 2 else None
+
+        # Convert ns -> ms only for display
+        print(f"  Avg latency: {avg / 1e6:.1f}ms")
+        print(f"  Min latency: {lowest / 1e6:.1f}ms")
+        print(f"  P50 latency: {p50 / 1e6:.1f}ms")
+        if p99 is not None:
+            print(f"  P99 latency: {p99 / 1e6:.1f}ms")
+        print(f"  Max latency: {highest / 1e6:.1f}ms")
 
     # NFR-1: System MUST process >1000 orders/second
     print_test(
         "Throughput requirement",
-        throughput >= 100,  # Relaxed for single-threaded test
+        throughput >= 100,  # Relaxed for local test client
         f"{throughput:.1f} orders/sec (target: >100 for test)",
         "NFR-1",
     )
@@ -500,22 +633,9 @@ def cleanup(processes):
     """Clean up running processes"""
     print_header("Cleanup")
 
-    for name, proc in processes:
-        try:
-            proc.terminate()
-            print(f"Stopped {name}")
-        except:
-            pass
-
-    # Wait for processes to terminate
-    time.sleep(2)
-
-    # Force kill if needed
-    for name, proc in processes:
-        try:
-            proc.kill()
-        except:
-            pass
+    stop_processes([proc for _, proc in processes])
+    for name, _ in processes:
+        print(f"Stopped {name}")
 
 
 def main():
@@ -531,8 +651,8 @@ def main():
     print(f"  Redis:         {REDIS_HOST}:{REDIS_PORT}")
     print()
 
-    # Start services
-    services_ok, processes = start_services()
+    # Start services (--reset wipes the Redis DB instead of just the test keys)
+    services_ok, processes = start_services(reset="--reset" in sys.argv[1:])
 
     if not services_ok:
         print(f"\n{RED}Services failed to start. Aborting tests.{RESET}")
@@ -540,32 +660,28 @@ def main():
         return 1
 
     try:
-        # Run test suites
-        test_order_submission()
-        test_validation()
-        test_redis_queue()
+        # Run independent suites concurrently; performance runs alone afterwards
+        asyncio.run(run_independent_suites())
         test_performance()
 
         # Summary
         print_header("Test Summary")
 
-        passed = sum(1 for r in test_results if r["passed"])
-        total = len(test_results)
-
-        # Group by requirement
-        by_requirement = {}
+        # Group by requirement in a single pass
+        passed_by_req = Counter()
+        total_by_req = Counter()
         for result in test_results:
-            req = result["requirement"] or "General"
-            if req not in by_requirement:
-                by_requirement[req] = {"passed": 0, "total": 0}
-            by_requirement[req]["total"] += 1
-            if result["passed"]:
-                by_requirement[req]["passed"] += 1
+            req = result.requirement or "General"
+            total_by_req[req] += 1
+            passed_by_req[req] += result.passed
+
+        passed = sum(passed_by_req.values())
+        total = len(test_results)
 
         print("Results by Requirement:")
-        for req, stats in sorted(by_requirement.items()):
-            status = "✓" if stats["passed"] == stats["total"] else "⚠"
-            print(f"  {status} {req}: {stats['passed']}/{stats['total']} tests passed")
+        for req in sorted(total_by_req):
+            status = "✓" if passed_by_req[req] == total_by_req[req] else "⚠"
+            print(f"  {status} {req}: {passed_by_req[req]}/{total_by_req[req]} tests passed")
 
         print()
         print("=" * 80)
@@ -582,13 +698,13 @@ def main():
             print()
 
             # Show failures
-            failures = [r for r in test_results if not r["passed"]]
+            failures = [r for r in test_results if not r.passed]
             if failures:
                 print("Failed tests:")
                 for failure in failures[:5]:  # Show first 5 failures
-                    print(f"  ✗ {failure['name']}")
-                    if failure["details"]:
-                        print(f"    {failure['details']}")
+                    print(f"  ✗ {failure.name}")
+                    if failure.details:
+                        print(f"    {failure.details}")
 
             return 1
 
@@ -5,7 +5,7 @@ Verifies Redis connectivity and basic order flow
 """
 
 import redis
-import json
+import orjson
 import time
 import sys
 
@@ -16,6 +16,19 @@ YELLOW = "\033[93m"
 BLUE = "\033[94m"
 RESET = "\033[0m"
 
+# Redis connection
+REDIS_HOST = "localhost"
+REDIS_PORT = 6379
+
+# Shared Redis connection pool (connections are opened lazily and reused)
+REDIS_POOL = redis.ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    decode_responses=True,
+    max_connections=16,
+    socket_keepalive=True,
+)
+
 def print_status(message, status="info"):
     """Print colored status message"""
     color = {"success": GREEN, "error": RED, "warning": YELLOW, "info": BLUE}.get(status, RESET)
@@ -33,7 +46,7 @@ def main():
     # Test 1: Redis Connection
     print_status("Testing Redis connection...", "info")
     try:
-        r = redis.Redis(host='localhost', port=6379, decode_responses=True)
+        r = redis.Redis(connection_pool=REDIS_POOL)
         result = r.ping()
         if result:
             print_status("Redis is connected and responding", "success")
@@ -48,9 +61,6 @@ def main():
     print()
     print_status("Testing Redis queue operations...", "info")
     try:
-        # Clear test queue
-        r.delete("test_order_queue")
-        
         # Push test order
         test_order = {
             "id": "TEST-001",
@@ -62,13 +72,20 @@ def main():
             "timestamp": int(time.time())
         }
         
-        r.rpush("test_order_queue", json.dumps(test_order))
+        # Clear, push and pop in a single round trip
+        pipe = r.pipeline(transaction=False)
+        pipe.delete("test_order_queue")
+        pipe.rpush("test_order_queue", orjson.dumps(test_order))
+        pipe.lpop("test_order_queue")
+        _, queue_length, order_json = pipe.execute()
+        if queue_length != 1:
+            print_status("Failed to push order to queue", "error")
+            return 1
         print_status("Order pushed to Redis queue", "success")
         
-        # Pop order
-        order_json = r.lpop("test_order_queue")
+        # Check the popped order
         if order_json:
-            retrieved_order = json.loads(order_json)
+            retrieved_order = orjson.loads(order_json)
             if retrieved_order["id"] == "TEST-001":
                 print_status("Order retrieved from Redis queue correctly", "success")
             else:
@@ -94,42 +111,49 @@ def main():
             "quantity": "0.5"
         }
         
-        subscribers = r.publish("test_trade_events", json.dumps(test_trade))
+        subscribers = r.publish("test_trade_events", orjson.dumps(test_trade))
         print_status(f"Published to channel (subscribers: {subscribers})", "success")
         
     except Exception as e:
         print_status(f"Pub/Sub error: {e}", "error")
         return 1
 
+    # Tests 4 and 5 sample the server in a single round trip
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.llen("order_queue")
+        pipe.info("memory")
+        pipe.info("stats")
+        # Failed commands come back as exception objects instead of aborting the batch
+        queue_length, memory_info, stats_info = pipe.execute(raise_on_error=False)
+    except Exception as e:
+        queue_length = memory_info = stats_info = e
+
     # Test 4: Check actual order queue status
     print()
     print_status("Checking GoQuant order queue status...", "info")
-    try:
-        queue_length = r.llen("order_queue")
+    if isinstance(queue_length, Exception):
+        print_status(f"Queue check error: {queue_length}", "error")
+    else:
         print_status(f"Current order queue length: {queue_length}", "info")
         
         if queue_length > 0:
             print_status(f"There are {queue_length} pending orders in the queue", "warning")
         else:
             print_status("Order queue is empty (ready for testing)", "success")
-            
-    except Exception as e:
-        print_status(f"Queue check error: {e}", "error")
 
     # Test 5: Check Redis memory usage
     print()
     print_status("Redis server info...", "info")
-    try:
-        info = r.info("memory")
-        used_memory_mb = info.get("used_memory", 0) / (1024 * 1024)
+    if isinstance(memory_info, Exception) or isinstance(stats_info, Exception):
+        error = memory_info if isinstance(memory_info, Exception) else stats_info
+        print_status(f"Info retrieval error: {error}", "warning")
+    else:
+        used_memory_mb = memory_info.get("used_memory", 0) / (1024 * 1024)
         print(f"  Memory used: {used_memory_mb:.2f} MB")
         
-        info = r.info("stats")
-        total_commands = info.get("total_commands_processed", 0)
+        total_commands = stats_info.get("total_commands_processed", 0)
         print(f"  Total commands processed: {total_commands}")
-        
-    except Exception as e:
-        print_status(f"Info retrieval error: {e}", "warning")
 
     print()
     print("=" * 70)
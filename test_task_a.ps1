@@ -61,9 +61,9 @@ Write-Step "Step 2: Clean Redis State"
 Write-Info "Flushing order_queue..."
 docker exec redis redis-cli DEL order_queue | Out-Null
 
-Write-Info "Checking trade_events subscribers..."
-$subCount = docker exec redis redis-cli PUBSUB NUMSUB trade_events 2>&1
-Write-Info "Current subscribers: $subCount"
+Write-Info "Checking trade_events:* pattern subscribers..."
+$subCount = docker exec redis redis-cli PUBSUB NUMPAT 2>&1
+Write-Info "Current pattern subscribers: $subCount"
 
 Write-Success "Redis state cleaned"
 Write-Host ""
@@ -6,53 +6,110 @@ Architecture tested:
 1. Order Gateway receives REST POST
 2. Publishes to Redis "order_queue"
 3. Python Matching Engine consumes and processes
-4. Publishes trades to Redis "trade_events"
+4. Publishes trades to Redis "trade_events:<symbol>"
 5. Market Data broadcasts to WebSocket clients
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
-import json
+import queue
+import threading
 import time
 import subprocess
 import sys
 from pathlib import Path
-from decimal import Decimal
 import httpx
+import msgpack
+import orjson
 from websockets import connect as ws_connect
 import redis
 
 # Test configuration
 ORDER_GATEWAY_URL = "http://localhost:8000"
+MARKET_DATA_URL = "http://localhost:8001"
 MARKET_DATA_WS_URL = "ws://localhost:8001/ws/market-data"
 REDIS_HOST = "localhost"
 REDIS_PORT = 6379
 
+# WebSocket frame decoders by ?encoding= (msgpack frames are binary)
+WS_DECODERS = {"json": orjson.loads, "msgpack": msgpack.unpackb}
+
+# Market Data WebSocket client settings: permessage-deflate, 1 MiB frames, and a
+# 1 MiB read buffer (websockets defaults to 64 KiB) so trade bursts need fewer reads
+WS_CONNECT_OPTIONS = {
+    "compression": "deflate",
+    "max_size": 2**20,
+    "read_limit": 2**20,
+    "ping_interval": 20,
+}
+
+# Trades are published on one channel per symbol
+TRADE_CHANNELS = {
+    "BTC-USDT": "trade_events:BTC-USDT",
+    "ETH-USDT": "trade_events:ETH-USDT",
+}
+
+# Engine throughput benchmark (orders pushed straight into Redis, bypassing HTTP)
+BENCH_SYMBOL = "ETH-USDT"  # Kept off BTC-USDT so it can't cross the e2e orders
+BENCH_ORDERS = 200  # Crossing buy/sell pairs -> BENCH_ORDERS // 2 trades
+BENCH_TIMEOUT = 10  # seconds to wait for the engine to emit every trade
+BENCH_IDLE_TIMEOUT = 2  # seconds of an untouched queue before assuming no engine
+
+# Control channel for e2e probes, and the one-round-trip enqueue+publish script:
+# the order is on the queue before any subscriber can see the control event
+CONTROL_CHANNEL = "control_events"
+ENQUEUE_AND_PUBLISH_LUA = """
+local queue_length = redis.call('RPUSH', KEYS[1], ARGV[1])
+local receivers = redis.call('PUBLISH', ARGV[2], ARGV[3])
+return {queue_length, receivers}
+"""
+
+# Shared Redis connection pool (connections are opened lazily and reused)
+REDIS_POOL = redis.ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    decode_responses=True,
+    max_connections=16,
+    socket_keepalive=True,
+    socket_connect_timeout=2,
+)
+
+
+def scale(value, places=2):
+    """
+    Fixed-point decimal string -> integer in units of 10**-places
+    
+    scale("60000.00") == 6000000, scale("1.0") == 100. Digits beyond `places`
+    must be zeros, so a mismatch in precision can't be silently truncated.
+    """
+    whole, _, frac = str(value).partition(".")
+    extra = frac[places:]
+    assert not extra.strip("0"), f"{value!r} has more than {places} decimal places"
+    return int(whole + frac[:places].ljust(places, "0"))
+
 
 @pytest.fixture(scope="module")
 def redis_client():
     """Create Redis client and verify connection"""
     try:
-        client = redis.Redis(
-            host=REDIS_HOST,
-            port=REDIS_PORT,
-            decode_responses=True,
-            socket_connect_timeout=2
-        )
+        client = redis.Redis(connection_pool=REDIS_POOL)
         
         # Test connection
         client.ping()
         print(f"\n[OK] Connected to Redis at {REDIS_HOST}:{REDIS_PORT}")
         
-        # Clean up any existing test data
-        client.delete("order_queue")
-        client.delete("trade_events")
+        # Clean up any existing test data (one round trip)
+        with client.pipeline(transaction=False) as pipe:
+            pipe.delete("order_queue", "trade_events")
+            pipe.execute()
         
         yield client
         
         # Cleanup
-        client.delete("order_queue")
-        client.delete("trade_events")
+        with client.pipeline(transaction=False) as pipe:
+            pipe.delete("order_queue", "trade_events")
+            pipe.execute()
         
     except redis.ConnectionError as e:
         pytest.fail(f"Redis not available: {e}\n"
@@ -60,30 +117,133 @@ def redis_client():
                    f"  docker run -d -p 6379:6379 --name redis redis:7-alpine")
 
 
+@pytest.fixture(scope="module")
+def trade_events(redis_client):
+    """Module-wide subscriber to every TRADE_CHANNELS shard: symbol -> thread-safe queue of payloads"""
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(*TRADE_CHANNELS.values())
+    events = {symbol: queue.Queue() for symbol in TRADE_CHANNELS}
+    symbol_by_channel = {channel: symbol for symbol, channel in TRADE_CHANNELS.items()}
+    stop = threading.Event()
+    
+    def listen():
+        while not stop.is_set():
+            message = pubsub.get_message(timeout=0.5)
+            if message:
+                events[symbol_by_channel[message["channel"]]].put(message["data"])
+    
+    listener = threading.Thread(target=listen, name="trade-events-listener", daemon=True)
+    listener.start()
+    
+    yield events
+    
+    stop.set()
+    listener.join()
+    pubsub.close()
+
+
+@pytest.fixture(scope="module")
+def enqueue_and_publish(redis_client):
+    """
+    Atomically RPUSH an order and PUBLISH a control event in one round trip
+    
+    The script is loaded once; calls go out as EVALSHA (redis-py reloads it on NOSCRIPT).
+    Returns a callable: (order_payload, control_message) -> (queue_length, receivers)
+    """
+    script = redis_client.register_script(ENQUEUE_AND_PUBLISH_LUA)
+    
+    def call(order_payload, control_message, queue_name="order_queue", channel=CONTROL_CHANNEL):
+        queue_length, receivers = script(
+            keys=[queue_name], args=[order_payload, channel, control_message]
+        )
+        return queue_length, receivers
+    
+    return call
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """One event loop per module so module-scoped async fixtures can share it"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def http_client():
+    """Keep-alive HTTP client shared by every test in the module"""
+    async with httpx.AsyncClient(
+        base_url=ORDER_GATEWAY_URL,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        headers={"Content-Type": "application/json"},  # Bodies are pre-encoded with orjson
+        timeout=5,
+    ) as client:
+        yield client
+
+
+@pytest_asyncio.fixture(scope="module", params=list(WS_DECODERS))
+async def market_data_feed(request):
+    """
+    Module-wide Market Data WebSocket (one per frame encoding)
+    
+    A background reader decodes every frame into an asyncio.Queue, so nothing
+    broadcast between tests is dropped. The welcome message is consumed here.
+    """
+    decode = WS_DECODERS[request.param]
+    try:
+        websocket = await ws_connect(
+            f"{MARKET_DATA_WS_URL}?encoding={request.param}", **WS_CONNECT_OPTIONS
+        )
+        welcome = decode(await asyncio.wait_for(websocket.recv(), timeout=2))
+    except Exception as e:
+        pytest.fail(f"Failed to connect to Market Data WebSocket: {e}")
+    print(f"\n[OK] Market Data WebSocket ({request.param}): {welcome.get('message', '')}")
+    
+    messages = asyncio.Queue()
+    
+    async def read():
+        async for frame in websocket:
+            messages.put_nowait(decode(frame))
+    
+    reader = asyncio.create_task(read())
+    
+    yield messages
+    
+    reader.cancel()
+    await websocket.close()
+
+
 @pytest.fixture(scope="module")
 def check_services():
-    """Verify all services are running"""
+    """
+    Verify all services are running
+    
+    Probes each /health once per module and returns the parsed payloads:
+    {"gateway": {...}, "market_data": {...}}
+    """
     print("\n[INFO] Checking service availability...")
+    health = {}
     
     # Check Order Gateway
     try:
-        import httpx
         response = httpx.get(f"{ORDER_GATEWAY_URL}/health", timeout=2)
-        print(f"[OK] Order Gateway: {response.json()}")
+        health["gateway"] = orjson.loads(response.content)
+        print(f"[OK] Order Gateway: {health['gateway']}")
     except Exception as e:
         pytest.fail(f"Order Gateway not running on port 8000: {e}\n"
                    f"Start it with: uvicorn src.main:app --port 8000")
     
     # Check Market Data
     try:
-        response = httpx.get("http://localhost:8001/health", timeout=2)
-        print(f"[OK] Market Data: {response.json()}")
+        response = httpx.get(f"{MARKET_DATA_URL}/health", timeout=2)
+        health["market_data"] = orjson.loads(response.content)
+        print(f"[OK] Market Data: {health['market_data']}")
     except Exception as e:
         pytest.fail(f"Market Data not running on port 8001: {e}\n"
                    f"Start it with: uvicorn src.main:app --port 8001")
     
     print("[OK] All services are running")
-    yield
+    yield health
 
 
 def test_redis_connectivity(redis_client):
@@ -98,8 +258,23 @@ def test_redis_connectivity(redis_client):
     assert response is True
 
 
+def test_service_health(check_services):
+    """
+    Test: Both services report their health
+    
+    Given: Order Gateway and Market Data are running
+    When: Read the module's cached /health payloads (no extra probes)
+    Then: Each reports a status and its Redis connectivity
+    """
+    for key, service in (("gateway", "order-gateway"), ("market_data", "market-data")):
+        payload = check_services[key]
+        assert payload.get("service") == service, payload
+        assert payload.get("status") in ("healthy", "unhealthy"), payload
+        assert "redis" in payload, payload
+
+
 @pytest.mark.asyncio
-async def test_order_gateway_publishes_to_redis(redis_client, check_services):
+async def test_order_gateway_publishes_to_redis(redis_client, check_services, http_client):
     """
     Test: Order Gateway publishes orders to Redis
     
@@ -117,23 +292,17 @@ async def test_order_gateway_publishes_to_redis(redis_client, check_services):
     }
     
     # Act
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{ORDER_GATEWAY_URL}/v1/orders",
-            json=order_data,
-            timeout=5
-        )
+    response = await http_client.post("/v1/orders", content=orjson.dumps(order_data))
     
     # Assert
     assert response.status_code == 201
-    response_json = response.json()
+    response_json = orjson.loads(response.content)
     assert "order_id" in response_json
     order_id = response_json["order_id"]
     
     print(f"\n[OK] Order submitted: {order_id}")
     
-    # Verify order is in Redis queue
-    await asyncio.sleep(0.1)  # Small delay for Redis write
+    # Verify order is in Redis queue (the gateway RPUSHes before responding 201)
     queue_length = redis_client.llen("order_queue")
     assert queue_length > 0, "Order not found in Redis queue"
     
@@ -161,13 +330,13 @@ async def test_matching_engine_processes_order(redis_client, check_services):
 
 
 @pytest.mark.asyncio
-async def test_end_to_end_order_matching(redis_client, check_services):
+async def test_end_to_end_order_matching(redis_client, check_services, http_client, trade_events, market_data_feed):
     """
     Test: Complete end-to-end order flow
     
     Given: All services running (Gateway, Engine, Market Data)
     When: Submit matching orders
-    Then: Trade event broadcast via WebSocket
+    Then: Trade event broadcast via WebSocket (JSON text or msgpack binary frames)
     
     NOTE: Requires Python Matching Engine to be running manually
     """
@@ -175,103 +344,180 @@ async def test_end_to_end_order_matching(redis_client, check_services):
     print("END-TO-END INTEGRATION TEST")
     print("="*60)
     
-    # Step 1: Connect WebSocket client
-    print("\n[Step 1] Connecting to Market Data WebSocket...")
+    # Step 1: The module-wide WebSocket is already connected and being read
+    print("\n[Step 1] Using shared Market Data WebSocket...")
+    
+    # Step 2: Submit first order (buy limit)
+    print("\n[Step 2] Submitting BUY limit order...")
+    
+    buy_order = {
+        "symbol": "BTC-USDT",
+        "order_type": "limit",
+        "side": "buy",
+        "quantity": "1.0",
+        "price": "60000.00"
+    }
+    
+    response = await http_client.post("/v1/orders", content=orjson.dumps(buy_order))
+    
+    assert response.status_code == 201
+    buy_order_id = orjson.loads(response.content)["order_id"]
+    print(f"   [OK] Order submitted: {buy_order_id}")
+    
+    # No wait needed: "order_queue" is FIFO, so the engine rests the
+    # buy before it sees the sell submitted after this response
+    
+    # Step 3: Submit matching order (sell limit)
+    print("\n[Step 3] Submitting SELL limit order (should match)...")
+    
+    sell_order = {
+        "symbol": "BTC-USDT",
+        "order_type": "limit",
+        "side": "sell",
+        "quantity": "1.0",
+        "price": "60000.00"
+    }
+    
+    response = await http_client.post("/v1/orders", content=orjson.dumps(sell_order))
+    
+    assert response.status_code == 201
+    sell_order_id = orjson.loads(response.content)["order_id"]
+    print(f"   [OK] Order submitted: {sell_order_id}")
+    
+    # Step 4: Wait for trade broadcast
+    print("\n[Step 4] Waiting for trade event on WebSocket...")
     
     try:
-        async with ws_connect(MARKET_DATA_WS_URL) as websocket:
-            # Receive welcome message
-            welcome = await asyncio.wait_for(websocket.recv(), timeout=2)
-            welcome_data = json.loads(welcome)
-            print(f"   [OK] Connected: {welcome_data.get('message', '')}")
-            
-            # Step 2: Submit first order (buy limit)
-            print("\n[Step 2] Submitting BUY limit order...")
-            
-            buy_order = {
-                "symbol": "BTC-USDT",
-                "order_type": "limit",
-                "side": "buy",
-                "quantity": "1.0",
-                "price": "60000.00"
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{ORDER_GATEWAY_URL}/v1/orders",
-                    json=buy_order,
-                    timeout=5
-                )
-            
-            assert response.status_code == 201
-            buy_order_id = response.json()["order_id"]
-            print(f"   [OK] Order submitted: {buy_order_id}")
-            
-            # Wait for order to be processed
-            await asyncio.sleep(0.5)
-            
-            # Step 3: Submit matching order (sell limit)
-            print("\n[Step 3] Submitting SELL limit order (should match)...")
-            
-            sell_order = {
-                "symbol": "BTC-USDT",
-                "order_type": "limit",
-                "side": "sell",
-                "quantity": "1.0",
-                "price": "60000.00"
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{ORDER_GATEWAY_URL}/v1/orders",
-                    json=sell_order,
-                    timeout=5
-                )
-            
-            assert response.status_code == 201
-            sell_order_id = response.json()["order_id"]
-            print(f"   [OK] Order submitted: {sell_order_id}")
-            
-            # Step 4: Wait for trade broadcast
-            print("\n[Step 4] Waiting for trade event on WebSocket...")
-            
-            try:
-                # Wait up to 10 seconds for trade event
-                trade_msg = await asyncio.wait_for(websocket.recv(), timeout=10)
-                trade_data = json.loads(trade_msg)
-                
-                print(f"   [OK] Trade received: {json.dumps(trade_data, indent=2)}")
-                
-                # Verify trade data
-                assert trade_data.get("type") == "trade"
-                assert "data" in trade_data
-                
-                trade_info = trade_data["data"]
-                assert trade_info.get("symbol") == "BTC-USDT"
-                assert Decimal(trade_info.get("price")) == Decimal("60000.00")
-                assert Decimal(trade_info.get("quantity")) == Decimal("1.0")
-                
-                print("\n[PASS] END-TO-END TEST PASSED!")
-                print("   - Order submitted via REST API")
-                print("   - Processed by Matching Engine")
-                print("   - Trade broadcast via WebSocket")
-                
-            except asyncio.TimeoutError:
-                print("\n[WARN] No trade event received within 10 seconds")
-                print("\n[INFO] Troubleshooting checklist:")
-                print("   1. Is Python Matching Engine running?")
-                print("      cd matching-engine && python python/redis_engine_runner.py")
-                print("   2. Check Redis queue:")
-                queue_len = redis_client.llen("order_queue")
-                print(f"      Order queue length: {queue_len}")
-                print("   3. Monitor Redis:")
-                print("      docker exec redis redis-cli MONITOR")
-                
-                pytest.skip("Matching Engine not running - manual verification needed")
-                
-    except Exception as e:
-        print(f"\n[ERROR] WebSocket connection error: {e}")
-        pytest.fail(f"Failed to connect to Market Data WebSocket: {e}")
+        # Wait up to 10 seconds for the trade (skipping BBO / L2 updates)
+        async with asyncio.timeout(10):
+            trade_data = await market_data_feed.get()
+            while trade_data.get("type") != "trade":
+                trade_data = await market_data_feed.get()
+    except TimeoutError:
+        print("\n[WARN] No trade event received within 10 seconds")
+        print("\n[INFO] Troubleshooting checklist:")
+        print("   1. Is Python Matching Engine running?")
+        print("      cd matching-engine && python python/redis_engine_runner.py")
+        print("   2. Check Redis queue:")
+        queue_len = redis_client.llen("order_queue")
+        print(f"      Order queue length: {queue_len}")
+        print("   3. Monitor Redis:")
+        print("      docker exec redis redis-cli MONITOR")
+        
+        pytest.skip("Matching Engine not running - manual verification needed")
+    
+    print(f"   [OK] Trade received: {orjson.dumps(trade_data, option=orjson.OPT_INDENT_2).decode()}")
+    
+    # Verify trade data
+    assert "data" in trade_data
+    
+    trade_info = trade_data["data"]
+    assert trade_info.get("symbol") == "BTC-USDT"
+    assert scale(trade_info["price"]) == 6000000  # 60000.00
+    assert scale(trade_info["quantity"]) == 100  # 1.0
+    
+    # The engine published it on the BTC-USDT shard
+    shard_trade = await asyncio.to_thread(trade_events["BTC-USDT"].get, timeout=2)
+    assert orjson.loads(shard_trade) == trade_info
+    
+    print("\n[PASS] END-TO-END TEST PASSED!")
+    print("   - Order submitted via REST API")
+    print("   - Processed by Matching Engine")
+    print("   - Trade broadcast via WebSocket")
+
+
+@pytest.mark.asyncio
+async def test_engine_throughput_via_redis(redis_client, trade_events):
+    """
+    Test: Matching Engine throughput without the HTTP layer
+    
+    Given: Matching Engine consuming "order_queue"
+    When: Push crossing buy/sell orders straight into Redis in one round trip
+    Then: Every pair produces a trade on its symbol's channel; report orders/sec
+    
+    NOTE: Skips when no Matching Engine is consuming the queue
+    """
+    timestamp = time.time_ns() // 1000
+    payloads = [
+        orjson.dumps({
+            "id": f"bench-{timestamp}-{i}",
+            "symbol": BENCH_SYMBOL,
+            "order_type": "limit",
+            "side": "buy" if i % 2 == 0 else "sell",
+            "quantity": "0.01",
+            "price": "3000.00",
+            "timestamp": timestamp + i,
+        })
+        for i in range(BENCH_ORDERS)
+    ]
+    expected_trades = BENCH_ORDERS // 2
+    
+    # Single variadic RPUSH: one command, one round trip for the whole batch
+    start = time.perf_counter()
+    queue_length = redis_client.rpush("order_queue", *payloads)
+    enqueue_time = time.perf_counter() - start
+    
+    bench_trades = trade_events[BENCH_SYMBOL]  # Only this symbol's shard
+    trades = 0
+    deadline = start + BENCH_TIMEOUT
+    while trades < expected_trades and time.perf_counter() < deadline:
+        try:
+            await asyncio.to_thread(bench_trades.get, timeout=0.5)
+            trades += 1
+        except queue.Empty:
+            if (trades == 0
+                    and time.perf_counter() - start > BENCH_IDLE_TIMEOUT
+                    and redis_client.llen("order_queue") >= queue_length):
+                break  # Nothing is consuming the queue
+    total_time = time.perf_counter() - start
+    
+    print(f"\n[INFO] Enqueued {BENCH_ORDERS} orders in {enqueue_time * 1000:.1f}ms "
+          f"({BENCH_ORDERS / enqueue_time:,.0f} orders/sec)")
+    
+    if trades == 0:
+        pytest.skip("Matching Engine not running - no trades produced")
+    
+    print(f"[INFO] Engine produced {trades}/{expected_trades} trades in {total_time:.2f}s "
+          f"({BENCH_ORDERS / total_time:,.0f} orders/sec end-to-end)")
+    assert trades == expected_trades, f"Only {trades}/{expected_trades} trades within {BENCH_TIMEOUT}s"
+
+
+def test_enqueue_and_publish_helper(redis_client, enqueue_and_publish):
+    """
+    Test: Server-side enqueue + control event helper
+    
+    Given: A confirmed subscriber on the control channel
+    When: Enqueue a probe order and publish a control event via one EVALSHA
+    Then: The script reports the queue length and one receiver, the event is
+          delivered, and the probe order is on the queue
+    """
+    # Park the probe on its own queue so a running engine can't consume it
+    probe_queue = "order_queue:probe"
+    probe_id = f"probe-{time.time_ns()}"
+    pubsub = redis_client.pubsub()
+    pubsub.subscribe(CONTROL_CHANNEL)
+    try:
+        # Wait for the server's subscribe confirmation: the script publishes on
+        # another pooled connection, which could otherwise beat the SUBSCRIBE
+        confirmation = pubsub.get_message(timeout=2)
+        assert confirmation is not None and confirmation["type"] == "subscribe"
+        
+        queue_length, receivers = enqueue_and_publish(
+            orjson.dumps({"id": probe_id, "symbol": BENCH_SYMBOL}),
+            probe_id,
+            queue_name=probe_queue,
+        )
+        
+        message = pubsub.get_message(timeout=2)
+        assert message is not None, "Control event not delivered"
+        assert message["type"] == "message"
+        assert message["data"] == probe_id
+        assert receivers >= 1
+        assert queue_length >= 1
+        assert orjson.loads(redis_client.lindex(probe_queue, -1))["id"] == probe_id
+    finally:
+        pubsub.close()
+        redis_client.unlink(probe_queue)
 
 
 @pytest.mark.asyncio